@@ -4,52 +4,36 @@ Tests all dimensions to find optimal configuration for maximizing dollar profit
 """
 
 import json
-from datetime import datetime, timezone
-from collections import defaultdict
 from itertools import product
-import sys
+
+from backtest_engine import build_trade_arrays, entry_minute_stats, simulate_vectorized
+from optimizer_cli import parse_args, report_pareto, run_grid, save_results
+from profiling import StageTimer, profile_to
+from time_cache import derive_entry_minutes, load_time_columns
+from trade_db import load_trade_arrays as load_db_trade_arrays
+from trade_model import group_by_window, trades_from_dicts
+from trade_store import open_trade_store, store_trade_arrays
+from trade_stream import stream_trades_by_window
+
+DATA_PATH = 'data/trades_backup_v1.json'
 
 # Load trade data
 def load_data():
-    with open('data/trades_backup_v1.json', 'r') as f:
+    with open(DATA_PATH, 'r') as f:
         data = json.load(f)
     
-    # Derive entry_minute from timestamp and window_start
-    for trade in data['trades']:
-        timestamp = datetime.fromisoformat(trade['timestamp'].replace('Z', '+00:00'))
-        window_start = datetime.fromisoformat(trade['window_start'].replace('Z', '+00:00'))
-        
-        # Calculate minutes since window start
-        diff = (timestamp - window_start).total_seconds() / 60
-        trade['entry_minute'] = int(diff) + 1  # 1-indexed
-        
-        # Add bet_amount field (will be calculated during simulation)
-        trade['bet_amount'] = 1.0  # placeholder
+    # entry_minute is derived from timestamp and window_start (1-indexed minutes since
+    # window start); the parsed columns are cached next to the export between runs
+    time_columns = load_time_columns(DATA_PATH, data['trades'])
+    trades = trades_from_dicts(data['trades'])
+    for trade, minute in zip(trades, time_columns['entry_minute'].tolist()):
+        trade.entry_minute = minute
     
-    return data['trades']
+    return trades
 
 def group_trades_by_window(trades):
     """Group trades by window_start and sort by entry_minute"""
-    windows = defaultdict(list)
-    for trade in trades:
-        windows[trade['window_start']].append(trade)
-    
-    # Sort trades within each window by entry_minute
-    for window in windows.values():
-        window.sort(key=lambda t: t['entry_minute'])
-    
-    return windows
-
-def detect_direction_flip(window_trades):
-    """Detect if there's a direction flip within a window"""
-    if len(window_trades) <= 1:
-        return False, None
-    
-    directions = [t['direction'] for t in window_trades]
-    for i in range(1, len(directions)):
-        if directions[i] != directions[i-1]:
-            return True, i  # Returns True and the index where flip occurred
-    return False, None
+    return group_by_window(trades)
 
 def simulate_with_config(trades_by_window, config):
     """
@@ -80,7 +64,7 @@ def simulate_with_config(trades_by_window, config):
         
         # Filter by minute range
         valid_trades = [t for t in window_trades 
-                       if config['min_minute'] <= t['entry_minute'] <= config['max_minute']]
+                       if config['min_minute'] <= t.entry_minute <= config['max_minute']]
         
         if not valid_trades:
             continue
@@ -88,7 +72,7 @@ def simulate_with_config(trades_by_window, config):
         # Track state within this window
         window_loss_count = 0
         window_trade_count = 0
-        first_direction = valid_trades[0]['direction']
+        first_direction = valid_trades[0].direction
         previous_direction = None
         
         for trade in valid_trades:
@@ -100,15 +84,15 @@ def simulate_with_config(trades_by_window, config):
                 should_skip = True
             
             # First direction only check
-            if config['first_direction_only'] and trade['direction'] != first_direction:
+            if config['first_direction_only'] and trade.direction != first_direction:
                 should_skip = True
             
             # Stop on flip check
-            if config['stop_on_flip'] and previous_direction and trade['direction'] != previous_direction:
+            if config['stop_on_flip'] and previous_direction is not None and trade.direction != previous_direction:
                 should_skip = True
             
             # Buy price filter
-            if config['max_buy_price'] and trade['buy_price_cents'] > config['max_buy_price']:
+            if config['max_buy_price'] and trade.buy_price_cents > config['max_buy_price']:
                 should_skip = True
             
             # Stop after N losses check (only counts losses that have already occurred)
@@ -122,9 +106,9 @@ def simulate_with_config(trades_by_window, config):
             # Execute trade
             bet_amount = balance * config['portfolio_pct']
             
-            if trade['result'] == 'WIN':
+            if trade.is_win:
                 # WIN profit = bet_amount * (1/buy_price - 1)
-                buy_price = trade['buy_price_cents'] / 100.0
+                buy_price = trade.buy_price_cents / 100.0
                 profit = bet_amount * (1.0 / buy_price - 1.0)
                 balance += profit
                 winning_trades += 1
@@ -138,16 +122,16 @@ def simulate_with_config(trades_by_window, config):
             
             total_trades += 1
             window_trade_count += 1
-            previous_direction = trade['direction']
+            previous_direction = trade.direction
             
             if balance < min_balance:
                 min_balance = balance
             
             trades_executed.append({
                 'window_start': window_start,
-                'entry_minute': trade['entry_minute'],
-                'direction': trade['direction'],
-                'result': trade['result'],
+                'entry_minute': trade.entry_minute,
+                'direction': trade.direction_label,
+                'result': trade.result_label,
                 'bet_amount': bet_amount,
                 'profit': profit,
                 'balance': balance
@@ -241,38 +225,51 @@ def config_to_string(config):
     
     return " | ".join(parts)
 
-def main():
-    print("Loading trade data...")
-    trades = load_data()
-    trades_by_window = group_trades_by_window(trades)
+def run_optimizer(args):
+    timer = StageTimer()
     
-    print(f"Loaded {len(trades)} trades across {len(trades_by_window)} windows")
+    print("Loading trade data...")
+    if args.store:
+        # Memory-mapped columns, no JSON parsing
+        with timer.stage('load'):
+            trade_arrays = store_trade_arrays(open_trade_store(args.store))
+    elif args.db:
+        # Rows come back from SQLite already grouped and sorted by window
+        with timer.stage('load'):
+            trade_arrays = load_db_trade_arrays(args.db, days=args.days)
+    elif args.stream:
+        # Trades are decoded one at a time and grouped as they arrive
+        with timer.stage('load'):
+            trade_arrays = build_trade_arrays(stream_trades_by_window(DATA_PATH, args.stream,
+                                                                     derive_entry_minutes))
+    else:
+        with timer.stage('load'):
+            trades = load_data()
+        with timer.stage('group'):
+            trade_arrays = build_trade_arrays(group_trades_by_window(trades))
+    
+    n_trades = len(trade_arrays['entry_minute'])
+    window_starts = trade_arrays['window_starts']
+    print(f"Loaded {n_trades} trades across {len(window_starts)} windows")
     
     # Analyze current data
     print("\n" + "="*80)
     print("CURRENT DATA ANALYSIS")
     print("="*80)
     
-    total_wins = sum(1 for t in trades if t['result'] == 'WIN')
-    total_losses = sum(1 for t in trades if t['result'] == 'LOSS')
-    overall_wr = total_wins / len(trades) if trades else 0
+    result_labels = trade_arrays['result_labels']
+    total_wins = int(trade_arrays['is_win'].sum())
+    total_losses = int((trade_arrays['result'] == result_labels.index('LOSS')).sum()) if 'LOSS' in result_labels else 0
+    overall_wr = total_wins / n_trades if n_trades else 0
     
     print(f"Overall record: {total_wins}W / {total_losses}L ({overall_wr*100:.1f}% win rate)")
     
-    total_flips = 0
-    windows_with_flips = 0
-    flip_windows_profitable = 0
-    
-    for window_start, window_trades in trades_by_window.items():
-        has_flip, flip_idx = detect_direction_flip(window_trades)
-        if has_flip:
-            windows_with_flips += 1
-            # Check if window was profitable
-            window_profit = sum(t.get('profit', 0) for t in window_trades)
-            if window_profit > 0:
-                flip_windows_profitable += 1
+    has_flip = trade_arrays['window_first_flip'] >= 0
+    windows_with_flips = int(has_flip.sum())
+    # Flip windows whose recorded profit was positive
+    flip_windows_profitable = int((has_flip & (trade_arrays['window_profit'] > 0)).sum())
     
-    print(f"Windows with direction flips: {windows_with_flips}/{len(trades_by_window)}")
+    print(f"Windows with direction flips: {windows_with_flips}/{len(window_starts)}")
     if windows_with_flips > 0:
         print(f"Profitable flip windows: {flip_windows_profitable}/{windows_with_flips} ({flip_windows_profitable/windows_with_flips*100:.1f}%)")
     
@@ -281,23 +278,21 @@ def main():
     print("TESTING ALL CONFIGURATIONS")
     print("="*80)
     
-    configs = generate_all_configs()
+    with timer.stage('configs'):
+        configs = generate_all_configs()
     print(f"Testing {len(configs)} configurations...\n")
     
-    results = []
-    for i, config in enumerate(configs):
-        if i % 10000 == 0 and i > 0:
-            print(f"Tested {i}/{len(configs)} configurations...")
-        
-        result = simulate_with_config(trades_by_window, config)
-        result['config'] = config
-        result['config_str'] = config_to_string(config)
-        results.append(result)
-    
-    print(f"Completed testing {len(configs)} configurations!\n")
+    # Group stats only count configs that traded
+    aggregator, frontier = run_grid(args, timer, trade_arrays, configs, config_to_string, traded_only=True)
+    if aggregator is None:
+        # A --shard run saved its partial results; --merge reports on them
+        return
     
-    # Sort by final balance
-    results.sort(key=lambda r: r['final_balance'], reverse=True)
+    # Ranked by final balance
+    with timer.stage('rank'):
+        results = aggregator.top()
+        for result in results:
+            result['config_str'] = config_to_string(result['config'])
     
     # Print top 20
     print("\n" + "="*80)
@@ -312,6 +307,10 @@ def main():
               f"{result['win_rate']*100:<7.1f}% {pf_str:<8} ${result['max_drawdown']:<9.2f} "
               f"{result['config_str']}")
     
+    pareto_results = None
+    if args.pareto:
+        pareto_results = report_pareto(args, timer, frontier, configs, config_to_string, width=140)
+    
     # Save detailed results
     print("\n" + "="*80)
     print("DETAILED ANALYSIS")
@@ -319,78 +318,52 @@ def main():
     
     # Analysis 1: Direction flipping
     print("\n1. IS DIRECTION FLIPPING PROFITABLE?")
-    allow_flips = [r for r in results if not r['config']['stop_on_flip'] and not r['config']['first_direction_only'] and r['total_trades'] > 0]
-    stop_on_flip = [r for r in results if r['config']['stop_on_flip'] and r['total_trades'] > 0]
-    first_dir_only = [r for r in results if r['config']['first_direction_only'] and r['total_trades'] > 0]
-    
-    if allow_flips:
-        avg_bal_allow = sum(r['final_balance'] for r in allow_flips) / len(allow_flips)
-        max_bal_allow = max(r['final_balance'] for r in allow_flips)
-        avg_trades_allow = sum(r['total_trades'] for r in allow_flips) / len(allow_flips)
-        print(f"   Allow flips: Avg balance ${avg_bal_allow:.2f}, Max ${max_bal_allow:.2f}, Avg {avg_trades_allow:.1f} trades")
-    
-    if stop_on_flip:
-        avg_bal_stop = sum(r['final_balance'] for r in stop_on_flip) / len(stop_on_flip)
-        max_bal_stop = max(r['final_balance'] for r in stop_on_flip)
-        avg_trades_stop = sum(r['total_trades'] for r in stop_on_flip) / len(stop_on_flip)
-        print(f"   Stop on flip: Avg balance ${avg_bal_stop:.2f}, Max ${max_bal_stop:.2f}, Avg {avg_trades_stop:.1f} trades")
-    
-    if first_dir_only:
-        avg_bal_first = sum(r['final_balance'] for r in first_dir_only) / len(first_dir_only)
-        max_bal_first = max(r['final_balance'] for r in first_dir_only)
-        avg_trades_first = sum(r['total_trades'] for r in first_dir_only) / len(first_dir_only)
-        print(f"   First dir only: Avg balance ${avg_bal_first:.2f}, Max ${max_bal_first:.2f}, Avg {avg_trades_first:.1f} trades")
+    by_flip = aggregator.summary('flip_mode')
+    
+    if 'allow' in by_flip:
+        allow = by_flip['allow']
+        print(f"   Allow flips: Avg balance ${allow['avg']:.2f}, Max ${allow['max']:.2f}, Avg {allow['avg_trades']:.1f} trades")
+    
+    if 'stop' in by_flip:
+        stop = by_flip['stop']
+        print(f"   Stop on flip: Avg balance ${stop['avg']:.2f}, Max ${stop['max']:.2f}, Avg {stop['avg_trades']:.1f} trades")
+    
+    if 'first' in by_flip:
+        first = by_flip['first']
+        print(f"   First dir only: Avg balance ${first['avg']:.2f}, Max ${first['max']:.2f}, Avg {first['avg_trades']:.1f} trades")
     
     # Analysis 2: Optimal buy price
     print("\n2. OPTIMAL MAX BUY PRICE?")
-    by_price = defaultdict(list)
-    for r in results:
-        if r['total_trades'] > 0:  # Only count configs that traded
-            price = r['config']['max_buy_price']
-            by_price[price].append(r['final_balance'])
+    by_price = aggregator.summary('max_buy_price')
     
     for price in sorted(by_price.keys(), key=lambda x: (x is None, x)):
-        avg = sum(by_price[price]) / len(by_price[price])
-        max_val = max(by_price[price])
+        avg = by_price[price]['avg']
+        max_val = by_price[price]['max']
         price_str = "No limit" if price is None else f"{price}c"
         print(f"   Max price {price_str:>12}: Avg ${avg:.2f}, Max ${max_val:.2f}")
     
     # Analysis 3: Portfolio sizing
     print("\n3. OPTIMAL PORTFOLIO SIZING?")
-    by_pct = defaultdict(list)
-    for r in results:
-        if r['total_trades'] > 0:
-            pct = r['config']['portfolio_pct']
-            by_pct[pct].append(r['final_balance'])
+    by_pct = aggregator.summary('portfolio_pct')
     
     for pct in sorted(by_pct.keys()):
-        avg = sum(by_pct[pct]) / len(by_pct[pct])
-        max_val = max(by_pct[pct])
+        avg = by_pct[pct]['avg']
+        max_val = by_pct[pct]['max']
         print(f"   {pct*100:.1f}%: Avg ${avg:.2f}, Max ${max_val:.2f}")
     
     # Analysis 4: Best minute ranges
     print("\n4. BEST MINUTE RANGES (Top 10)?")
-    by_minute = defaultdict(list)
-    for r in results:
-        if r['total_trades'] > 0:
-            minute_key = (r['config']['min_minute'], r['config']['max_minute'])
-            by_minute[minute_key].append(r['final_balance'])
+    by_minute = aggregator.summary('minute_range')
     
-    minute_avg = [(k, sum(v)/len(v), max(v), len(v)) for k, v in by_minute.items()]
-    minute_avg.sort(key=lambda x: x[2], reverse=True)  # Sort by max
+    minute_avg = [(k, v['avg'], v['max'], v['count']) for k, v in by_minute.items()]
+    minute_avg.sort(key=lambda x: (-x[2], x[0]))  # Sort by max, ties in grid order
     
     for (min_m, max_m), avg, max_val, count in minute_avg[:10]:
         print(f"   Minutes {min_m:2d}-{max_m:2d}: Avg ${avg:.2f}, Max ${max_val:.2f} ({count} configs)")
     
     # Analysis 5: Individual minute performance
     print("\n5. INDIVIDUAL MINUTE WIN RATES?")
-    minute_stats = defaultdict(lambda: {'wins': 0, 'total': 0, 'profit': 0.0})
-    for trade in trades:
-        minute = trade['entry_minute']
-        minute_stats[minute]['total'] += 1
-        if trade['result'] == 'WIN':
-            minute_stats[minute]['wins'] += 1
-        minute_stats[minute]['profit'] += trade.get('profit', 0)
+    minute_stats = entry_minute_stats(trade_arrays)
     
     for minute in sorted(minute_stats.keys()):
         stats = minute_stats[minute]
@@ -423,24 +396,7 @@ def main():
     print(f"   - First Direction Only: {best['config']['first_direction_only']}")
     
     # Save full results
-    with open('data/optimization_results_full.json', 'w') as f:
-        # Save top 100 results (without trade history to keep file size down)
-        top_results = []
-        for r in results[:100]:
-            top_results.append({
-                'config': r['config'],
-                'config_str': r['config_str'],
-                'final_balance': r['final_balance'],
-                'total_trades': r['total_trades'],
-                'win_rate': r['win_rate'],
-                'max_drawdown': r['max_drawdown'],
-                'profit_factor': r['profit_factor'] if r['profit_factor'] != float('inf') else None,
-                'gross_wins': r['gross_wins'],
-                'gross_losses': r['gross_losses']
-            })
-        json.dump(top_results, f, indent=2)
-    
-    print("\nFull results saved to data/optimization_results_full.json")
+    save_results(args, timer, results, frontier, pareto_results)
     
     # Compare to baseline (current config)
     print("\n" + "="*80)
@@ -459,7 +415,7 @@ def main():
         'first_direction_only': False
     }
     
-    current_result = simulate_with_config(trades_by_window, current_config)
+    current_result = simulate_vectorized(trade_arrays, current_config)
     
     print(f"\nCurrent Config (M2-9, 1%, no filters):")
     print(f"   Final Balance: ${current_result['final_balance']:.2f}")
@@ -475,6 +431,13 @@ def main():
         improvement = ((best['final_balance'] - current_result['final_balance']) / 
                        current_result['final_balance'] * 100)
         print(f"\nImprovement: {improvement:+.1f}%")
+    
+    timer.report(configs=len(configs))
+
+def main():
+    args = parse_args(__doc__.strip().splitlines()[0], suffix='_full')
+    with profile_to(args.profile):
+        run_optimizer(args)
 
 if __name__ == '__main__':
     main()
@@ -0,0 +1,492 @@
+"""
+Vectorized NumPy backtest engine for the BTC Scalper config sweep
+Loads trades once into columnar arrays and evaluates the config rules as batched masks
+"""
+
+from collections import OrderedDict
+
+import numpy as np
+
+from trade_model import DIRECTION_LABELS, RESULT_LABELS
+
+# Balance every simulation starts from, as in simulate_with_config
+STARTING_BALANCE = 100.0
+
+def build_trade_arrays(trades_by_window):
+    """
+    Flatten grouped Trade records into columnar NumPy arrays
+
+    Windows are laid out in sorted window_start order and trades keep their
+    within-window order, so the arrays replay exactly like simulate_with_config.
+    Direction and result keep the trade_model codes.
+    """
+    window_starts = sorted(trades_by_window.keys())
+
+    window_idx = []
+    entry_minute = []
+    direction = []
+    result = []
+    buy_price_cents = []
+    profit = []
+
+    for w, window_start in enumerate(window_starts):
+        for trade in trades_by_window[window_start]:
+            window_idx.append(w)
+            entry_minute.append(trade.entry_minute)
+            direction.append(trade.direction)
+            result.append(trade.result)
+            buy_price_cents.append(trade.buy_price_cents)
+            profit.append(trade.profit)
+
+    window_idx = np.array(window_idx, dtype=np.int64)
+    counts = np.bincount(window_idx, minlength=len(window_starts))
+    offsets = np.zeros(len(window_starts) + 1, dtype=np.int64)
+    np.cumsum(counts, out=offsets[1:])
+
+    return finish_trade_arrays({
+        'window_starts': window_starts,
+        'direction_labels': list(DIRECTION_LABELS),
+        'result_labels': list(RESULT_LABELS),
+        'window_idx': window_idx,
+        'window_offsets': offsets,
+        'entry_minute': np.array(entry_minute, dtype=np.int64),
+        'direction': np.array(direction, dtype=np.int8),
+        'result': np.array(result, dtype=np.int8),
+        'buy_price_cents': np.array(buy_price_cents, dtype=np.float64),
+        'profit': np.array(profit, dtype=np.float64),
+    })
+
+def finish_trade_arrays(arrays):
+    """Add the derived columns the engine needs to a set of base trade columns"""
+    result_labels = arrays['result_labels']
+    win_code = result_labels.index('WIN') if 'WIN' in result_labels else -1
+
+    arrays['window_counts'] = np.diff(arrays['window_offsets'])
+    arrays['is_win'] = arrays['result'] == win_code
+    # WIN multiplier on the bet, computed exactly as simulate_with_config does
+    arrays['odds'] = 1.0 / (arrays['buy_price_cents'] / 100.0) - 1.0
+    arrays.update(window_features(arrays))
+    return arrays
+
+# Feature table columns with one value per window, and per-trade running values within the window
+WINDOW_FEATURES = ('window_first_direction', 'window_first_flip', 'window_max_price', 'window_profit')
+PREFIX_FEATURES = ('losses_before',)
+
+def window_features(arrays):
+    """
+    Per-window feature table, built once when the trades are loaded
+
+    Per window: direction code of the first trade (-1 for an empty
+    window), position of the first direction flip (-1 if none), highest buy
+    price (NaN if empty) and recorded profit. Per trade: losses earlier in
+    its window. The flip reports read window_first_flip / window_profit, and
+    select_trades reads the rest instead of rescanning trades.
+    """
+    n = len(arrays['direction'])
+    offsets = arrays['window_offsets']
+    counts = arrays['window_counts']
+    n_windows = len(counts)
+
+    features = {
+        'window_first_direction': np.full(n_windows, -1, dtype=np.int8),
+        'window_first_flip': np.full(n_windows, -1, dtype=np.int64),
+        'window_max_price': np.full(n_windows, np.nan),
+        'window_profit': np.zeros(n_windows, dtype=np.float64),
+        'losses_before': np.zeros(n, dtype=np.int64),
+    }
+    if n == 0:
+        return features
+
+    nonempty = counts > 0
+    starts = offsets[:-1][nonempty]
+
+    direction = arrays['direction']
+    features['window_first_direction'][nonempty] = direction[starts]
+
+    changed = np.zeros(n, dtype=bool)
+    changed[1:] = direction[1:] != direction[:-1]
+    changed[starts] = False
+    first = np.minimum.reduceat(np.where(changed, np.arange(n), n), starts)
+    features['window_first_flip'][nonempty] = np.where(first < n, first - starts, -1)
+
+    losses = ~arrays['is_win']
+    loss_count = np.cumsum(losses, dtype=np.int64)
+    before_window = np.repeat(loss_count[starts] - losses[starts], counts[nonempty])
+    features['losses_before'] = loss_count - losses - before_window
+
+    features['window_max_price'][nonempty] = np.maximum.reduceat(arrays['buy_price_cents'], starts)
+
+    features['window_profit'][nonempty] = np.add.reduceat(arrays['profit'], starts)
+    return features
+
+def _window_cumsum(values, arrays):
+    """Inclusive cumulative sum that restarts at every window boundary"""
+    values = values.astype(np.int64)
+    total = np.cumsum(values)
+    starts = arrays['window_offsets'][:-1]
+    before_window = total[starts] - values[starts]
+    return total - np.repeat(before_window, arrays['window_counts'])
+
+def _first_in_window(mask, arrays):
+    """Direction of the first masked trade in each window, broadcast back to every trade (-1 if none)"""
+    if mask.all():
+        return arrays['window_first_direction'][arrays['window_idx']]
+    n = len(mask)
+    positions = np.where(mask, np.arange(n), n)
+    first = np.minimum.reduceat(positions, arrays['window_offsets'][:-1])
+
+    first_direction = np.full(len(first), -1, dtype=np.int8)
+    has_trade = first < n
+    first_direction[has_trade] = arrays['direction'][first[has_trade]]
+    return first_direction[arrays['window_idx']]
+
+def selection_key(config):
+    """Every config field except portfolio_pct; configs sharing it execute the same trades"""
+    return (
+        config['min_minute'],
+        config['max_minute'],
+        config['max_buy_price'],
+        config['stop_on_flip'],
+        config['stop_after_n_losses'],
+        config['max_trades_per_window'],
+        config['first_direction_only'],
+    )
+
+# Byte budget of the per-trade tables a SelectionCache keeps
+SELECTION_CACHE_BYTES = 256 * 1024 * 1024
+
+class SelectionCache:
+    """
+    LRU of per-trade selection tables keyed by rule signature
+
+    select_trades works in two stages: the static filters, keyed by
+    (min_minute, max_minute, max_buy_price), and the direction rules on top
+    of them, keyed by that plus (first_direction_only, stop_on_flip). The
+    second stage records each candidate's rank and prior losses within its
+    window, so every max_trades_per_window / stop_after_n_losses variant is
+    two comparisons away. Tables are only valid for the trade arrays they
+    were built from, so use one cache per set of arrays.
+    """
+
+    def __init__(self, max_bytes=SELECTION_CACHE_BYTES):
+        self.max_bytes = max_bytes
+        self.nbytes = 0
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()
+
+    def get(self, key, compute):
+        """Table for key, built with compute() on a miss"""
+        entry = self._entries.get(key)
+        if entry is not None:
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry
+
+        self.misses += 1
+        entry = compute()
+        self._entries[key] = entry
+        self.nbytes += sum(values.nbytes for values in entry.values())
+        # Evict least recently used tables, but always keep the newest one
+        while self.nbytes > self.max_bytes and len(self._entries) > 1:
+            _, evicted = self._entries.popitem(last=False)
+            self.nbytes -= sum(values.nbytes for values in evicted.values())
+        return entry
+
+def _static_filters(arrays, min_minute, max_minute, max_buy_price):
+    """Minute-range and buy-price candidates, plus the first in-range direction per trade"""
+    in_range = (arrays['entry_minute'] >= min_minute) & (arrays['entry_minute'] <= max_minute)
+    candidate = in_range.copy()
+    # A cap at or above every window's highest price filters nothing
+    if max_buy_price and max_buy_price < np.nanmax(arrays['window_max_price']):
+        candidate &= arrays['buy_price_cents'] <= max_buy_price
+
+    return {
+        'candidate': candidate,
+        'first_direction': _first_in_window(in_range, arrays),
+    }
+
+def _rule_tables(static, arrays, first_direction_only, stop_on_flip):
+    """Candidates after the direction rules, with their within-window rank and prior losses"""
+    candidate = static['candidate']
+
+    # First direction only: first direction among the minute-filtered trades
+    if first_direction_only:
+        candidate = candidate & (arrays['direction'] == static['first_direction'])
+
+    # Stop on flip: the first executed trade fixes the direction, and
+    # previous_direction never changes after that
+    if stop_on_flip:
+        candidate = candidate & (arrays['direction'] == _first_in_window(candidate, arrays))
+
+    if candidate.all():
+        # Nothing filtered: prior losses come straight from the feature table
+        return {
+            'candidate': candidate,
+            'rank': _window_cumsum(candidate, arrays),
+            'losses_before': arrays['losses_before'],
+        }
+
+    candidate_losses = candidate & ~arrays['is_win']
+    return {
+        'candidate': candidate,
+        'rank': _window_cumsum(candidate, arrays),
+        'losses_before': _window_cumsum(candidate_losses, arrays) - candidate_losses,
+    }
+
+def select_trades(arrays, config, cache=None):
+    """
+    Boolean mask of the trades simulate_with_config would execute for this config
+
+    Every skip rule is either static per trade or only depends on how many
+    trades / losses were already taken in the window, so the executed set is
+    always a prefix of the statically filtered candidates in each window.
+    Pass a SelectionCache to reuse the per-signature tables across configs.
+    """
+    n = len(arrays['entry_minute'])
+    if n == 0:
+        return np.zeros(0, dtype=bool)
+
+    static_key = (config['min_minute'], config['max_minute'], config['max_buy_price'])
+    rule_key = static_key + (bool(config['first_direction_only']), bool(config['stop_on_flip']))
+
+    def static():
+        return _static_filters(arrays, *static_key)
+
+    def rules():
+        static_tables = cache.get(static_key, static) if cache is not None else static()
+        return _rule_tables(static_tables, arrays, *rule_key[3:])
+
+    tables = cache.get(rule_key, rules) if cache is not None else rules()
+    executed = tables['candidate']
+
+    # Max trades per window: candidate rank within the window
+    if config['max_trades_per_window']:
+        executed = executed & (tables['rank'] <= config['max_trades_per_window'])
+
+    # Stop after N losses: losses among earlier candidates in the window
+    if config['stop_after_n_losses']:
+        executed = executed & (tables['losses_before'] < config['stop_after_n_losses'])
+
+    return executed
+
+def compound_executed(arrays, executed_idx, portfolio_pct):
+    """
+    Replay the balance for the executed trades
+
+    Uses the same float operations in the same order as simulate_with_config,
+    so every metric is bit-identical to the reference implementation.
+    """
+    return _compound(arrays['is_win'][executed_idx].tolist(),
+                     arrays['odds'][executed_idx].tolist(),
+                     portfolio_pct)
+
+# End-of-run state a simulation can be resumed from, in result-dict keys
+STATE_KEYS = ('final_balance', 'max_drawdown', 'total_trades', 'winning_trades', 'gross_wins', 'gross_losses')
+
+def _compound(wins, odds_list, portfolio_pct, start=None):
+    if start is None:
+        balance = STARTING_BALANCE
+        min_balance = balance
+        total_trades = 0
+        winning_trades = 0
+        gross_wins = 0.0
+        gross_losses = 0.0
+    else:
+        balance, min_balance, total_trades, winning_trades, gross_wins, gross_losses = start
+
+    for win, odds in zip(wins, odds_list):
+        bet_amount = balance * portfolio_pct
+
+        if win:
+            profit = bet_amount * odds
+            balance += profit
+            winning_trades += 1
+            gross_wins += profit
+        else:
+            balance += -bet_amount
+            gross_losses += bet_amount
+
+        if balance < min_balance:
+            min_balance = balance
+
+    total_trades += len(wins)
+    win_rate = winning_trades / total_trades if total_trades > 0 else 0
+    profit_factor = gross_wins / gross_losses if gross_losses > 0 else float('inf')
+
+    return {
+        'final_balance': balance,
+        'total_trades': total_trades,
+        'winning_trades': winning_trades,
+        'win_rate': win_rate,
+        'max_drawdown': min_balance,
+        'profit_factor': profit_factor,
+        'gross_wins': gross_wins,
+        'gross_losses': gross_losses,
+    }
+
+def simulate_vectorized(arrays, config):
+    """Columnar equivalent of simulate_with_config (without the per-trade history)"""
+    executed_idx = np.flatnonzero(select_trades(arrays, config))
+    return compound_executed(arrays, executed_idx, config['portfolio_pct'])
+
+def compound_log(wins, odds, portfolio_pcts, start_states=None):
+    """
+    Closed-form balance replay of one executed-trade sequence under several sizings
+
+    Each trade multiplies the balance by 1 + pct * odds (WIN) or 1 - pct
+    (LOSS), so the path is a cumulative sum of log growth factors: one
+    (sizings x trades) matrix instead of a Python loop per trade. Agrees
+    with the trade-by-trade replay to float rounding (~1e-12 relative),
+    not bit for bit. wins / odds are arrays over the executed trades.
+    """
+    pcts = np.asarray(portfolio_pcts, dtype=np.float64)[:, None]
+    if start_states is None:
+        start_states = [None] * len(pcts)
+    fresh = (STARTING_BALANCE, STARTING_BALANCE, 0, 0, 0.0, 0.0)
+    starts = [fresh if start is None else start for start in start_states]
+    start_balance = np.array([start[0] for start in starts], dtype=np.float64)
+
+    n = len(wins)
+    if n == 0:
+        # Nothing executed: every sizing keeps the balance it started from
+        final_balance = low = start_balance
+        gross_wins = gross_losses = np.zeros(len(pcts))
+    else:
+        log_factors = np.where(wins, np.log1p(pcts * odds), np.log1p(-pcts))
+        level = np.cumsum(log_factors, axis=1)
+        path = start_balance[:, None] * np.exp(level)
+        # Balance before each trade, and the bet placed on it
+        bets = np.empty_like(path)
+        bets[:, 0] = start_balance
+        bets[:, 1:] = path[:, :-1]
+        bets *= pcts
+
+        final_balance = path[:, -1]
+        low = path.min(axis=1)
+        gross_wins = np.where(wins, bets * odds, 0.0).sum(axis=1)
+        gross_losses = np.where(wins, 0.0, bets).sum(axis=1)
+    n_wins = int(np.count_nonzero(wins))
+
+    results = []
+    for k, (_, min_balance, total_trades, winning_trades, wins_before, losses_before) in enumerate(starts):
+        total_trades += n
+        winning_trades += n_wins
+        gw = wins_before + float(gross_wins[k])
+        gl = losses_before + float(gross_losses[k])
+        results.append({
+            'final_balance': float(final_balance[k]),
+            'total_trades': total_trades,
+            'winning_trades': winning_trades,
+            'win_rate': winning_trades / total_trades if total_trades > 0 else 0,
+            'max_drawdown': min(min_balance, float(low[k])),
+            'profit_factor': gw / gl if gl > 0 else float('inf'),
+            'gross_wins': gw,
+            'gross_losses': gl,
+        })
+    return results
+
+def simulate_sizings(arrays, config, portfolio_pcts, cache=None, start_states=None, exact=False):
+    """
+    Simulate one trade selection under several portfolio_pct values
+
+    The executed trades do not depend on bet size, so the selection is
+    computed once and all sizings are compounded together with
+    compound_log. exact=True replays trade by trade instead, bit-identical
+    to simulate_with_config. start_states, if given, holds one STATE_KEYS
+    tuple (or None) per sizing to resume from.
+    """
+    return simulate_executed(arrays, select_trades(arrays, config, cache), portfolio_pcts, start_states, exact)
+
+def simulate_executed(arrays, executed, portfolio_pcts, start_states=None, exact=False):
+    """simulate_sizings for an executed-trade mask that is already built"""
+    executed_idx = np.flatnonzero(executed)
+    if not exact:
+        return compound_log(arrays['is_win'][executed_idx], arrays['odds'][executed_idx],
+                            portfolio_pcts, start_states)
+
+    wins = arrays['is_win'][executed_idx].tolist()
+    odds_list = arrays['odds'][executed_idx].tolist()
+    if start_states is None:
+        start_states = [None] * len(portfolio_pcts)
+    return [_compound(wins, odds_list, pct, start) for pct, start in zip(portfolio_pcts, start_states)]
+
+# Per-trade columns carried along when windows are sliced or resampled
+TRADE_COLUMNS = ('entry_minute', 'direction', 'result', 'buy_price_cents', 'profit', 'is_win', 'odds') + PREFIX_FEATURES
+
+def slice_windows(arrays, first_window):
+    """Trade arrays restricted to windows[first_window:], as views over the original columns"""
+    offsets = arrays['window_offsets']
+    first_trade = offsets[first_window]
+
+    sliced = dict(arrays)
+    sliced['window_starts'] = arrays['window_starts'][first_window:]
+    sliced['window_offsets'] = offsets[first_window:] - first_trade
+    sliced['window_counts'] = arrays['window_counts'][first_window:]
+    sliced['window_idx'] = arrays['window_idx'][first_trade:] - first_window
+    for column in WINDOW_FEATURES:
+        sliced[column] = arrays[column][first_window:]
+    for column in TRADE_COLUMNS:
+        sliced[column] = arrays[column][first_trade:]
+    return sliced
+
+def take_windows(arrays, window_indices):
+    """
+    Trade arrays made of the given windows, in the given order
+
+    Indices may repeat (bootstrap resampling); every copy is laid out as a
+    separate window.
+    """
+    window_indices = np.asarray(window_indices, dtype=np.int64)
+    counts = arrays['window_counts'][window_indices]
+    offsets = np.zeros(len(window_indices) + 1, dtype=np.int64)
+    np.cumsum(counts, out=offsets[1:])
+    trade_idx = (np.repeat(arrays['window_offsets'][window_indices] - offsets[:-1], counts) +
+                 np.arange(offsets[-1]))
+
+    taken = dict(arrays)
+    taken['window_starts'] = [arrays['window_starts'][w] for w in window_indices.tolist()]
+    taken['window_offsets'] = offsets
+    taken['window_counts'] = counts
+    taken['window_idx'] = np.repeat(np.arange(len(window_indices), dtype=np.int64), counts)
+    for column in WINDOW_FEATURES:
+        taken[column] = arrays[column][window_indices]
+    for column in TRADE_COLUMNS:
+        taken[column] = arrays[column][trade_idx]
+    return taken
+
+def entry_minute_stats(arrays):
+    """Wins, trade count and recorded profit per entry_minute"""
+    minutes, inverse = np.unique(arrays['entry_minute'], return_inverse=True)
+    totals = np.bincount(inverse, minlength=len(minutes))
+    wins = np.bincount(inverse, weights=arrays['is_win'], minlength=len(minutes))
+    profits = np.bincount(inverse, weights=arrays['profit'], minlength=len(minutes))
+    return {
+        int(minute): {'wins': int(w), 'total': int(t), 'profit': float(p)}
+        for minute, w, t, p in zip(minutes, wins, totals, profits)
+    }
+
+def window_log_growth(arrays, executed, portfolio_pct):
+    """
+    Per-window log balance multiplier and log of the lowest intra-window balance
+
+    Returns (log_growth, log_low): each window multiplies the balance by
+    exp(log_growth[w]), and the balance dips to at most exp(log_low[w])
+    times its value at the window start (log_low <= 0). Window order is
+    then free to change, which is what the Monte Carlo resampling needs.
+    """
+    n_windows = len(arrays['window_counts'])
+    if len(executed) == 0:
+        return np.zeros(n_windows), np.zeros(n_windows)
+
+    factors = np.where(arrays['is_win'], 1.0 + portfolio_pct * arrays['odds'], 1.0 - portfolio_pct)
+    log_factors = np.where(executed, np.log(factors), 0.0)
+
+    starts = arrays['window_offsets'][:-1]
+    total = np.cumsum(log_factors)
+    before_window = total[starts] - log_factors[starts]
+    prefix = total - np.repeat(before_window, arrays['window_counts'])
+
+    log_growth = np.add.reduceat(log_factors, starts)
+    log_low = np.minimum(np.minimum.reduceat(prefix, starts), 0.0)
+    return log_growth, log_low
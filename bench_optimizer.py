@@ -0,0 +1,190 @@
+"""
+Benchmark harness for the BTC Scalper config optimizer
+Times each optimizer stage on seeded synthetic trade sets at several scales and
+compares the numbers against a saved baseline
+
+Usage:
+    python bench_optimizer.py                                  # default scales
+    python bench_optimizer.py --windows 1000 10000 --configs 2000 --repeat 5
+    python bench_optimizer.py --save-baseline data/bench_baseline.json
+    python bench_optimizer.py --compare data/bench_baseline.json
+"""
+
+import argparse
+import json
+import os
+import platform
+import sys
+import tempfile
+import time
+from datetime import datetime, timezone
+
+import numpy as np
+
+from analyze_optimal_config import config_to_string, generate_all_configs, group_trades_by_window
+from backtest_engine import build_trade_arrays
+from profiling import peak_rss_mb
+from sweep import resolve_workers, run_sweep
+from sweep_results import ResultAggregator, result_record
+from synthetic_trades import generate_trades
+from trade_model import load_trades
+
+STAGES = ['load', 'group', 'configs', 'simulate', 'rank', 'serialize']
+
+# Default slowdown (fraction) over the baseline reported as a regression
+REGRESSION_THRESHOLD = 0.20
+
+def sample_configs(configs, count):
+    """Evenly strided subset of the grid so every dimension stays represented"""
+    if not count or count >= len(configs):
+        return configs
+    step = len(configs) / count
+    return [configs[int(i * step)] for i in range(count)]
+
+def bench_scale(windows, args, workdir):
+    """Run every stage once on a synthetic data set with this many windows"""
+    trades = generate_trades(windows, args.trades_per_window, args.flip_prob,
+                             args.price_mean, args.price_std, seed=args.seed)
+    trades_path = os.path.join(workdir, f'trades_{windows}.json')
+    with open(trades_path, 'w') as f:
+        json.dump({'trades': trades}, f)
+    del trades
+
+    timings = {}
+
+    start = time.perf_counter()
+    trades = load_trades(trades_path)
+    timings['load'] = time.perf_counter() - start
+
+    start = time.perf_counter()
+    trade_arrays = build_trade_arrays(group_trades_by_window(trades))
+    timings['group'] = time.perf_counter() - start
+
+    start = time.perf_counter()
+    configs = generate_all_configs()
+    timings['configs'] = time.perf_counter() - start
+    configs = sample_configs(configs, args.configs)
+
+    start = time.perf_counter()
+    results = list(run_sweep(trade_arrays, configs, resolve_workers(args.workers)))
+    timings['simulate'] = time.perf_counter() - start
+
+    start = time.perf_counter()
+    aggregator = ResultAggregator(top_k=100)
+    for i, result in results:
+        aggregator.add(i, configs[i], result)
+    top = aggregator.top()
+    timings['rank'] = time.perf_counter() - start
+
+    start = time.perf_counter()
+    for result in top:
+        result['config_str'] = config_to_string(result['config'])
+    with open(os.path.join(workdir, 'optimization_results.json'), 'w') as f:
+        json.dump([result_record(r) for r in top], f, indent=2)
+    timings['serialize'] = time.perf_counter() - start
+
+    return {
+        'windows': windows,
+        'trades': len(trades),
+        'configs': len(configs),
+        'stages': timings,
+        'configs_per_sec': len(configs) / timings['simulate'] if timings['simulate'] > 0 else None,
+        # Process-wide high-water mark, so it only ever grows across scales
+        'peak_rss_mb': peak_rss_mb(),
+    }
+
+def print_scale(run):
+    print(f"\n{run['windows']} windows / {run['trades']} trades / {run['configs']} configs")
+    for stage in STAGES:
+        print(f"   {stage:<10} {run['stages'][stage]*1000:>10.1f} ms")
+    if run['configs_per_sec']:
+        print(f"   Throughput: {run['configs_per_sec']:,.0f} configs/sec")
+    if run['peak_rss_mb'] is not None:
+        print(f"   Peak RSS:   {run['peak_rss_mb']:.1f} MB")
+
+def compare(report, baseline_path, threshold=REGRESSION_THRESHOLD):
+    """Print per-stage ratios against a baseline; returns the number of regressions"""
+    with open(baseline_path, 'r') as f:
+        baseline = json.load(f)
+    baseline_runs = {(r['windows'], r['configs']): r for r in baseline['runs']}
+
+    print("\n" + "="*80)
+    print(f"COMPARISON TO BASELINE ({baseline_path}, {baseline['created']})")
+    print("="*80)
+
+    regressions = 0
+    for run in report['runs']:
+        base = baseline_runs.get((run['windows'], run['configs']))
+        if base is None:
+            print(f"\n{run['windows']} windows / {run['configs']} configs: not in baseline")
+            continue
+        print(f"\n{run['windows']} windows / {run['configs']} configs:")
+        for stage in STAGES:
+            before, after = base['stages'][stage], run['stages'][stage]
+            ratio = after / before if before > 0 else float('inf')
+            flag = ""
+            if ratio > 1 + threshold and after - before > 0.005:
+                flag = "  <-- REGRESSION"
+                regressions += 1
+            print(f"   {stage:<10} {before*1000:>10.1f} ms -> {after*1000:>10.1f} ms  ({ratio:.2f}x){flag}")
+    return regressions
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark the config optimizer stages')
+    parser.add_argument('--windows', type=int, nargs='+', default=[100, 1000, 10000],
+                        help='window counts to benchmark')
+    parser.add_argument('--trades-per-window', type=int, default=3)
+    parser.add_argument('--flip-prob', type=float, default=0.1)
+    parser.add_argument('--price-mean', type=float, default=58.0)
+    parser.add_argument('--price-std', type=float, default=10.0)
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--configs', type=int, default=5000,
+                        help='configs to simulate per scale, strided across the grid (0 = full grid)')
+    parser.add_argument('--workers', type=int, default=1,
+                        help='worker processes for the simulate stage (0 = one per core)')
+    parser.add_argument('--repeat', type=int, default=3,
+                        help='runs per scale; the fastest time of each stage is kept')
+    parser.add_argument('--save-baseline', metavar='PATH', help='write this run as a baseline JSON')
+    parser.add_argument('--compare', metavar='PATH', help='compare this run against a baseline JSON')
+    parser.add_argument('--threshold', type=float, default=REGRESSION_THRESHOLD,
+                        help='slowdown fraction flagged as a regression by --compare')
+    args = parser.parse_args()
+
+    report = {
+        'created': datetime.now(timezone.utc).strftime('%Y-%m-%dT%H:%M:%SZ'),
+        'python': platform.python_version(),
+        'numpy': np.__version__,
+        'params': {
+            'trades_per_window': args.trades_per_window,
+            'flip_prob': args.flip_prob,
+            'price_mean': args.price_mean,
+            'price_std': args.price_std,
+            'seed': args.seed,
+            'workers': args.workers,
+            'repeat': args.repeat,
+        },
+        'runs': [],
+    }
+
+    with tempfile.TemporaryDirectory() as workdir:
+        for windows in args.windows:
+            runs = [bench_scale(windows, args, workdir) for _ in range(max(1, args.repeat))]
+            run = runs[-1]
+            run['stages'] = {stage: min(r['stages'][stage] for r in runs) for stage in STAGES}
+            run['configs_per_sec'] = max(r['configs_per_sec'] or 0 for r in runs) or None
+            print_scale(run)
+            report['runs'].append(run)
+
+    if args.save_baseline:
+        with open(args.save_baseline, 'w') as f:
+            json.dump(report, f, indent=2)
+        print(f"\nBaseline saved to {args.save_baseline}")
+
+    if args.compare:
+        regressions = compare(report, args.compare, args.threshold)
+        print(f"\n{regressions} stage regression(s) over {args.threshold*100:.0f}%")
+        if regressions:
+            sys.exit(1)
+
+if __name__ == '__main__':
+    main()
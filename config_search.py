@@ -0,0 +1,185 @@
+"""
+Budgeted config search for the BTC Scalper optimizer
+Successive halving over window subsets: many configs are scored on a small
+random sample of windows, the best 1/eta move on to a sample eta times larger,
+and the last rung is scored on the full data. The budget is counted in
+full-data config evaluations, so the cost stays fixed however large the grid gets.
+
+Usage:
+    python config_search.py                         # budget 2000 over data/trades.json
+    python config_search.py --budget 500 --eta 4 --seed 7
+    python config_search.py --exhaustive            # also run the full grid and report the gap
+"""
+
+import argparse
+
+import numpy as np
+
+from analyze_optimal_config import (config_to_string, generate_all_configs, group_trades_by_window,
+                                    load_data)
+from backtest_engine import STARTING_BALANCE, build_trade_arrays, take_windows
+from sweep import resolve_workers, run_sweep
+from trade_db import load_trade_arrays as load_db_trade_arrays
+from trade_store import open_trade_store, store_trade_arrays
+
+# Smallest window sample a rung is scored on; fewer windows rank configs mostly on noise
+MIN_WINDOWS = 30
+
+def halving_plan(n_configs, budget, eta=3, n_windows=None, min_windows=MIN_WINDOWS):
+    """
+    Rungs of a successive halving run as [(n_candidates, window_fraction)]
+
+    Picks the number of rungs that lets the most configs into the first rung
+    while the total cost, sum(n_candidates * window_fraction), stays within
+    budget and no rung samples fewer than min_windows of n_windows. The last
+    rung always uses every window. Raises ValueError for a budget below one
+    evaluation or eta below 2.
+    """
+    if budget < 1:
+        raise ValueError(f"Budget must be at least 1 full-data evaluation, got {budget:g}")
+    if eta < 2:
+        raise ValueError(f"eta must be at least 2, got {eta}")
+    if budget >= n_configs:
+        return [(n_configs, 1.0)]
+
+    best = None
+    rungs = 1
+    while eta ** (rungs - 1) <= n_configs:
+        if rungs > 1 and n_windows is not None and n_windows / eta ** (rungs - 1) < min_windows:
+            break
+        n_first = min(n_configs, int(budget * eta ** (rungs - 1) / rungs))
+        if n_first >= eta ** (rungs - 1) and (best is None or n_first > best[0]):
+            best = (n_first, rungs)
+        rungs += 1
+
+    n_first, rungs = best
+    return [(n_first // eta ** k, float(eta) ** (k - rungs + 1)) for k in range(rungs)]
+
+def successive_halving(trade_arrays, configs, budget, eta=3, seed=0, workers=1, min_windows=MIN_WINDOWS):
+    """
+    Search configs with a budget of full-data evaluations
+
+    Returns (ranked, stats): ranked is [(config_index, result)] for the
+    configs that reached the last rung, best first (ties keep the lower
+    index), with results over every window; stats has the evaluations spent
+    and per-rung sizes.
+    """
+    n_windows = len(trade_arrays['window_starts'])
+    plan = halving_plan(len(configs), budget, eta, n_windows, min_windows)
+
+    rng = np.random.default_rng(seed)
+    candidates = np.sort(rng.choice(len(configs), size=plan[0][0], replace=False))
+    # Rungs sample nested prefixes of one shuffle, so survivors keep seeing the windows they won on
+    window_order = rng.permutation(n_windows)
+
+    evaluations = 0.0
+    rungs = []
+    for rung, (n_candidates, fraction) in enumerate(plan):
+        candidates = candidates[:n_candidates]
+        n_sample = n_windows if rung == len(plan) - 1 else max(1, int(round(n_windows * fraction)))
+        sample = take_windows(trade_arrays, np.sort(window_order[:n_sample]))
+
+        rung_configs = [configs[i] for i in candidates]
+        scores = np.empty(len(candidates))
+        results = [None] * len(candidates)
+        for j, result in run_sweep(sample, rung_configs, workers):
+            scores[j] = result['final_balance']
+            results[j] = result
+
+        evaluations += len(candidates) * n_sample / n_windows
+        rungs.append({'configs': len(candidates), 'windows': n_sample})
+
+        # Best first, ties to the lower config index
+        order = np.lexsort((candidates, -scores))
+        candidates = candidates[order]
+        results = [results[j] for j in order]
+
+    ranked = list(zip(candidates.tolist(), results))
+    return ranked, {'evaluations': evaluations, 'rungs': rungs}
+
+def parse_args():
+    parser = argparse.ArgumentParser(description='Budgeted successive halving search over the config grid')
+    parser.add_argument('--budget', type=float, default=2000,
+                        help='full-data config evaluations to spend')
+    parser.add_argument('--eta', type=int, default=3,
+                        help='fraction of configs dropped per rung is 1 - 1/eta')
+    parser.add_argument('--min-windows', type=int, default=MIN_WINDOWS,
+                        help='smallest window sample a rung is scored on')
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--workers', type=int, default=1,
+                        help='worker processes per rung (0 = one per core)')
+    parser.add_argument('--exhaustive', action='store_true',
+                        help='also run the full grid and report how far the search landed from its best')
+    source = parser.add_mutually_exclusive_group()
+    source.add_argument('--store', metavar='DIR',
+                        help='read trades from a columnar store written by trade_store.py instead of JSON')
+    source.add_argument('--db', metavar='PATH', nargs='?', const='data/trades.db',
+                        help='read trades from the bot\'s SQLite database (default data/trades.db)')
+    parser.add_argument('--days', type=float,
+                        help='with --db, only load windows from the last N days')
+    args = parser.parse_args()
+    if args.days is not None and not args.db:
+        parser.error('--days only applies to --db')
+    if args.budget < 1:
+        parser.error('--budget must be at least 1')
+    if args.eta < 2:
+        parser.error('--eta must be at least 2')
+    return args
+
+def main():
+    args = parse_args()
+
+    print("Loading trade data...")
+    if args.store:
+        trade_arrays = store_trade_arrays(open_trade_store(args.store))
+    elif args.db:
+        trade_arrays = load_db_trade_arrays(args.db, days=args.days)
+    else:
+        trade_arrays = build_trade_arrays(group_trades_by_window(load_data()))
+    print(f"Loaded {len(trade_arrays['entry_minute'])} trades across "
+          f"{len(trade_arrays['window_starts'])} windows")
+
+    configs = generate_all_configs()
+    workers = resolve_workers(args.workers)
+
+    print("\n" + "="*80)
+    print(f"SUCCESSIVE HALVING (budget {args.budget:g} of {len(configs)} evaluations, eta {args.eta})")
+    print("="*80)
+    ranked, stats = successive_halving(trade_arrays, configs, args.budget, args.eta, args.seed,
+                                       workers, args.min_windows)
+    for k, rung in enumerate(stats['rungs']):
+        print(f"   Rung {k}: {rung['configs']:>6} configs on {rung['windows']} windows")
+    print(f"   Spent {stats['evaluations']:.1f} full-data evaluations "
+          f"({stats['evaluations'] / len(configs) * 100:.1f}% of the grid)")
+
+    print(f"\n{'Rank':<6} {'Final $':<10} {'Trades':<8} {'Win%':<8} {'MinBal':<10} Config")
+    print("-" * 100)
+    for rank, (i, result) in enumerate(ranked[:10], 1):
+        print(f"{rank:<6} ${result['final_balance']:<9.2f} {result['total_trades']:<8} "
+              f"{result['win_rate']*100:<7.1f}% ${result['max_drawdown']:<9.2f} "
+              f"{config_to_string(configs[i])}")
+
+    if args.exhaustive:
+        found = ranked[0][1]['final_balance']
+        best = None
+        better = 0
+        for i, result in run_sweep(trade_arrays, configs, workers):
+            balance = result['final_balance']
+            if best is None or balance > best[1] or (balance == best[1] and i < best[0]):
+                best = (i, balance)
+            if balance > found:
+                better += 1
+
+        gain = best[1] - STARTING_BALANCE
+        print("\n" + "="*80)
+        print("SEARCH VS EXHAUSTIVE GRID")
+        print("="*80)
+        print(f"   Exhaustive best: ${best[1]:.2f}  {config_to_string(configs[best[0]])}")
+        print(f"   Search best:     ${found:.2f}  {config_to_string(configs[ranked[0][0]])}")
+        print(f"   Gap: ${best[1] - found:.2f}"
+              + (f" ({(found - STARTING_BALANCE) / gain * 100:.1f}% of the best profit captured)" if gain > 0 else ""))
+        print(f"   Search best ranks #{better + 1} of {len(configs)} configs "
+              f"(top {(better + 1) / len(configs) * 100:.2f}%)")
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,62 @@
+"""
+Dataset loading for the BTC Scalper optimizers
+Turns a dataset path into engine trade arrays, whatever its format: a JSON
+export (with or without entry_minute), a trade_store.py directory or the
+bot's SQLite database
+"""
+
+import json
+import os
+
+import numpy as np
+
+from backtest_engine import build_trade_arrays
+from time_cache import derive_entry_minutes, load_time_columns
+from trade_db import load_trade_arrays as load_db_trade_arrays
+from trade_model import group_by_window, trades_from_dicts
+from trade_store import open_trade_store, store_trade_arrays
+from trade_stream import stream_trades_by_window
+
+DB_SUFFIXES = ('.db', '.sqlite', '.sqlite3')
+
+def dataset_label(path):
+    """Short name of a dataset for report columns: the file or directory name without extension"""
+    return os.path.splitext(os.path.basename(os.path.normpath(path)))[0]
+
+def _stream_entry_minutes(batch):
+    # Backup-format exports only carry timestamps; derive just the trades missing entry_minute
+    minutes = np.array([trade.get('entry_minute', 0) for trade in batch], dtype=np.int64)
+    missing = [k for k, trade in enumerate(batch) if 'entry_minute' not in trade]
+    if missing:
+        minutes[missing] = derive_entry_minutes([batch[k] for k in missing])
+    return minutes
+
+def load_json_trades(path):
+    """Trade records of a JSON export, deriving entry_minute from timestamps where it is missing"""
+    with open(path, 'r') as f:
+        trade_dicts = json.load(f)['trades']
+    trades = trades_from_dicts(trade_dicts)
+
+    if any(trade.entry_minute is None for trade in trades):
+        # The parsed time columns are cached next to the export between runs
+        minutes = load_time_columns(path, trade_dicts)['entry_minute'].tolist()
+        for trade, minute in zip(trades, minutes):
+            if trade.entry_minute is None:
+                trade.entry_minute = minute
+    return trades
+
+def load_dataset(path, stream=None, days=None):
+    """
+    Engine trade arrays for a dataset path
+
+    Directories are read as trade_store.py stores, .db / .sqlite files as
+    the bot's database (optionally only the last `days`), anything else as
+    a JSON export; stream is a batch size for incremental JSON decoding.
+    """
+    if os.path.isdir(path):
+        return store_trade_arrays(open_trade_store(path))
+    if os.path.splitext(path)[1].lower() in DB_SUFFIXES:
+        return load_db_trade_arrays(path, days=days)
+    if stream:
+        return build_trade_arrays(stream_trades_by_window(path, stream, _stream_entry_minutes))
+    return build_trade_arrays(group_by_window(load_json_trades(path)))
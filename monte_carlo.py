@@ -0,0 +1,175 @@
+"""
+Monte Carlo window resampling for the BTC Scalper optimizer results
+Replays the top configs over thousands of resampled window orders to get
+percentile bands for final balance and min balance (max_drawdown) and the
+probability of ruin, instead of the single historical path
+
+Usage:
+    python monte_carlo.py                               # top 100 of data/optimization_results.json
+    python monte_carlo.py --paths 20000 --top 20 --mode permute
+    python monte_carlo.py --ruin-balance 75
+    python monte_carlo.py --results data/optimization_results_full.json --trades data/trades_backup_v1.json
+"""
+
+import argparse
+import json
+
+import numpy as np
+
+from analyze_optimal_config import DATA_PATH, config_to_string
+from backtest_engine import STARTING_BALANCE, SelectionCache, select_trades, window_log_growth
+from datasets import load_dataset
+from trade_db import load_trade_arrays as load_db_trade_arrays
+from trade_store import open_trade_store, store_trade_arrays
+
+PERCENTILES = (5, 25, 50, 75, 95)
+
+# Upper bound on paths x windows cells held per batch (per config) to cap memory
+BATCH_CELLS = 4_000_000
+
+def simulate_paths(log_growth, log_low, n_paths, seed=0, mode='bootstrap'):
+    """
+    Final and minimum balance of every config on n_paths resampled window orders
+
+    log_growth / log_low are (configs, windows) matrices from
+    window_log_growth. 'bootstrap' draws windows with replacement,
+    'permute' shuffles them (final balance is then fixed and only the
+    drawdown varies). All configs see the same resampled orders, so their
+    bands are directly comparable. Returns two (configs, n_paths) arrays.
+    """
+    log_growth = np.atleast_2d(log_growth)
+    log_low = np.atleast_2d(log_low)
+    n_configs, n_windows = log_growth.shape
+    finals = np.full((n_configs, n_paths), STARTING_BALANCE)
+    lows = np.full((n_configs, n_paths), STARTING_BALANCE)
+    if n_windows == 0:
+        return finals, lows
+
+    rng = np.random.default_rng(seed)
+    batch = max(1, BATCH_CELLS // n_windows)
+    for start in range(0, n_paths, batch):
+        n = min(batch, n_paths - start)
+        if mode == 'bootstrap':
+            order = rng.integers(0, n_windows, size=(n, n_windows))
+        else:
+            order = rng.permuted(np.tile(np.arange(n_windows), (n, 1)), axis=1)
+
+        for c in range(n_configs):
+            growth = log_growth[c][order]
+            level = np.cumsum(growth, axis=1)
+            # Lowest point: balance entering a window times that window's intra-window dip
+            low = np.minimum((level - growth + log_low[c][order]).min(axis=1), 0.0)
+            finals[c, start:start + n] = STARTING_BALANCE * np.exp(level[:, -1])
+            lows[c, start:start + n] = STARTING_BALANCE * np.exp(low)
+
+    return finals, lows
+
+def summarize(finals, lows, ruin_balance):
+    """Percentile bands and ruin / loss probabilities for one config's paths"""
+    return {
+        'final_balance': dict(zip(PERCENTILES, np.percentile(finals, PERCENTILES).tolist())),
+        'min_balance': dict(zip(PERCENTILES, np.percentile(lows, PERCENTILES).tolist())),
+        'p_ruin': float(np.mean(lows <= ruin_balance)),
+        'p_loss': float(np.mean(finals < STARTING_BALANCE)),
+    }
+
+def mismatched_results(ranked, selections):
+    """
+    1-based ranks whose recorded total_trades differs from their selection on the loaded trades
+
+    A results file only describes the data it was swept on; a mismatch
+    means the trades loaded here are not that data.
+    """
+    return [rank for rank, (record, executed) in enumerate(zip(ranked, selections), 1)
+            if int(np.count_nonzero(executed)) != record['total_trades']]
+
+def parse_args():
+    parser = argparse.ArgumentParser(description='Monte Carlo window resampling of the top configs')
+    parser.add_argument('--results', default='data/optimization_results.json',
+                        help='ranked results written by analyze_optimal_config.py')
+    parser.add_argument('--top', type=int, default=100, help='configs to resample, best first')
+    parser.add_argument('--paths', type=int, default=10000)
+    parser.add_argument('--mode', choices=['bootstrap', 'permute'], default='bootstrap',
+                        help='draw windows with replacement, or only shuffle their order')
+    parser.add_argument('--ruin-balance', type=float, default=STARTING_BALANCE / 2,
+                        help='a path is ruined once its balance touches this level')
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--output', default='data/monte_carlo_results.json')
+    source = parser.add_mutually_exclusive_group()
+    source.add_argument('--trades', metavar='PATH', default=DATA_PATH,
+                        help=f'JSON export the results were swept on (default {DATA_PATH}); '
+                             'must match --results')
+    source.add_argument('--store', metavar='DIR',
+                        help='read trades from a columnar store written by trade_store.py instead of JSON')
+    source.add_argument('--db', metavar='PATH', nargs='?', const='data/trades.db',
+                        help='read trades from the bot\'s SQLite database (default data/trades.db)')
+    parser.add_argument('--days', type=float,
+                        help='with --db, only load windows from the last N days')
+    args = parser.parse_args()
+    if args.days is not None and not args.db:
+        parser.error('--days only applies to --db')
+    return args
+
+def main():
+    args = parse_args()
+
+    print("Loading trade data...")
+    if args.store:
+        trade_arrays = store_trade_arrays(open_trade_store(args.store))
+    elif args.db:
+        trade_arrays = load_db_trade_arrays(args.db, days=args.days)
+    else:
+        trade_arrays = load_dataset(args.trades)
+    n_windows = len(trade_arrays['window_starts'])
+    print(f"Loaded {len(trade_arrays['entry_minute'])} trades across {n_windows} windows")
+
+    with open(args.results, 'r') as f:
+        ranked = json.load(f)[:args.top]
+    configs = [record['config'] for record in ranked]
+
+    cache = SelectionCache()
+    selections = [select_trades(trade_arrays, config, cache) for config in configs]
+    mismatched = mismatched_results(ranked, selections)
+    if mismatched:
+        raise SystemExit(f"{args.results} does not match the loaded trades ({len(mismatched)} of {len(ranked)} "
+                         f"configs execute a different number of trades, first at rank {mismatched[0]}); "
+                         "pass the data it was swept on with --trades, --store or --db")
+    outcomes = [window_log_growth(trade_arrays, executed, config['portfolio_pct'])
+                for config, executed in zip(configs, selections)]
+    log_growth = np.array([growth for growth, _ in outcomes]).reshape(len(configs), n_windows)
+    log_low = np.array([low for _, low in outcomes]).reshape(len(configs), n_windows)
+
+    print("\n" + "="*80)
+    print(f"MONTE CARLO ({args.paths} {args.mode} paths x {n_windows} windows, "
+          f"top {len(configs)} configs, ruin at ${args.ruin_balance:.2f})")
+    print("="*80)
+    finals, lows = simulate_paths(log_growth, log_low, args.paths, args.seed, args.mode)
+
+    print(f"{'Rank':<6} {'Hist $':<10} {'P5 $':<10} {'P50 $':<10} {'P95 $':<10} "
+          f"{'P5 Min':<10} {'P50 Min':<10} {'Ruin':>7}  {'Loss':>7}  Config")
+    print("-" * 140)
+    report = []
+    for rank, (record, final, low) in enumerate(zip(ranked, finals, lows), 1):
+        stats = summarize(final, low, args.ruin_balance)
+        report.append(dict(stats, config=record['config'], config_str=record['config_str'],
+                           historical_final_balance=record['final_balance'],
+                           historical_max_drawdown=record['max_drawdown']))
+        bands, mins = stats['final_balance'], stats['min_balance']
+        print(f"{rank:<6} ${record['final_balance']:<9.2f} ${bands[5]:<9.2f} ${bands[50]:<9.2f} "
+              f"${bands[95]:<9.2f} ${mins[5]:<9.2f} ${mins[50]:<9.2f} "
+              f"{stats['p_ruin']*100:>6.2f}%  {stats['p_loss']*100:>6.2f}%  "
+              f"{config_to_string(record['config'])}")
+
+    with open(args.output, 'w') as f:
+        json.dump({
+            'paths': args.paths,
+            'mode': args.mode,
+            'seed': args.seed,
+            'ruin_balance': args.ruin_balance,
+            'windows': n_windows,
+            'configs': report,
+        }, f, indent=2)
+    print(f"\nMonte Carlo results saved to {args.output}")
+
+if __name__ == '__main__':
+    main()
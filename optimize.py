@@ -0,0 +1,175 @@
+"""
+Multi-dataset BTC Scalper config optimizer
+Runs the config grid on any number of datasets at once and reports every
+config's rank and final balance on each, so robustness across data sets can
+be compared in one pass
+
+Usage:
+    python optimize.py data/trades.json data/trades_backup_v1.json
+    python optimize.py data/trades.json data/trades_store data/trades.db --workers 0
+    python optimize.py data/trades.json data/trades_backup_v1.json --sort mean --top 50
+"""
+
+import argparse
+import json
+
+import numpy as np
+
+from analyze_optimal_config import config_to_string, generate_all_configs
+from datasets import dataset_label, load_dataset
+from sweep import resolve_workers, run_sweeps
+from trade_stream import BATCH_SIZE as STREAM_BATCH_SIZE
+
+def rank_balances(balances):
+    """1-based rank of every config by final balance (ties to the lower config index)"""
+    order = np.lexsort((np.arange(len(balances)), -balances))
+    ranks = np.empty(len(balances), dtype=np.int64)
+    ranks[order] = np.arange(1, len(balances) + 1)
+    return ranks
+
+def average_ranks(values):
+    """1-based ranks of values, ties sharing the mean of the ranks they span"""
+    order = np.argsort(values, kind='stable')
+    sorted_values = values[order]
+    starts = np.flatnonzero(np.r_[True, sorted_values[1:] != sorted_values[:-1]])
+    ends = np.r_[starts[1:], len(values)]
+    ranks = np.empty(len(values))
+    ranks[order] = np.repeat((starts + ends + 1) / 2, ends - starts)
+    return ranks
+
+def combined_order(ranks, sort='worst'):
+    """Config indices ordered by their worst (or mean) rank across datasets, ties to the lower index"""
+    key = ranks.max(axis=0) if sort == 'worst' else ranks.mean(axis=0)
+    return np.lexsort((np.arange(ranks.shape[1]), key))
+
+def unique_labels(paths):
+    """Report label per dataset, numbered when two paths share a name"""
+    labels = [dataset_label(path) for path in paths]
+    return [f"{label}#{k + 1}" if labels.count(label) > 1 else label for k, label in enumerate(labels)]
+
+def parse_args():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('datasets', nargs='+', metavar='DATASET',
+                        help='JSON export, trade_store.py directory or SQLite database')
+    parser.add_argument('--workers', type=int, default=1,
+                        help='worker processes shared by all sweeps (0 = one per core)')
+    parser.add_argument('--sort', choices=['worst', 'mean'], default='worst',
+                        help='order the combined report by worst or mean rank across datasets')
+    parser.add_argument('--top', type=int, default=20, help='rows of the combined report to print')
+    parser.add_argument('--save-top', type=int, default=100, help='rows of the combined report to save')
+    parser.add_argument('--output', default='data/optimization_results_combined.json')
+    parser.add_argument('--stream', metavar='BATCH', type=int, nargs='?', const=STREAM_BATCH_SIZE,
+                        help='decode JSON exports incrementally in batches of BATCH trades')
+    parser.add_argument('--days', type=float,
+                        help='only load windows from the last N days of database datasets')
+    parser.add_argument('--no-prune', dest='prune', action='store_false',
+                        help='simulate every config, even those executing the same trades as another')
+    mode = parser.add_mutually_exclusive_group()
+    mode.add_argument('--exact', action='store_true', default=True,
+                      help='replay balances trade by trade, bit-identical to simulate_with_config (the default)')
+    mode.add_argument('--fast', dest='exact', action='store_false',
+                      help='compound in log space instead; final balances can differ in the last digits')
+    return parser.parse_args()
+
+def main():
+    args = parse_args()
+    labels = unique_labels(args.datasets)
+
+    print("Loading trade data...")
+    datasets = []
+    for label, path in zip(labels, args.datasets):
+        arrays = load_dataset(path, stream=args.stream, days=args.days)
+        print(f"   {label}: {len(arrays['entry_minute'])} trades across "
+              f"{len(arrays['window_starts'])} windows ({path})")
+        datasets.append(arrays)
+
+    configs = generate_all_configs()
+    workers = resolve_workers(args.workers)
+
+    print("\n" + "="*80)
+    print(f"TESTING {len(configs)} CONFIGURATIONS ON {len(datasets)} DATASETS")
+    print("="*80)
+    if workers > 1:
+        print(f"Running sweeps on {workers} worker processes...")
+
+    balances = np.empty((len(datasets), len(configs)))
+    trades = np.empty((len(datasets), len(configs)), dtype=np.int64)
+    win_rates = np.empty((len(datasets), len(configs)))
+    drawdowns = np.empty((len(datasets), len(configs)))
+    total = len(datasets) * len(configs)
+    prune_stats = {}
+    sweep = run_sweeps(datasets, configs, workers, exact=args.exact, prune=args.prune, stats=prune_stats)
+    for done, (d, i, result) in enumerate(sweep, 1):
+        if done % 50000 == 0:
+            print(f"Tested {done}/{total} config-dataset pairs...")
+        balances[d, i] = result['final_balance']
+        trades[d, i] = result['total_trades']
+        win_rates[d, i] = result['win_rate']
+        drawdowns[d, i] = result['max_drawdown']
+    print(f"Completed {total} config-dataset pairs!\n")
+    for label, stats in zip(labels, prune_stats.get('datasets', [])):
+        print(f"   {label}: {stats['simulations']} simulations for {stats['configs']} configs "
+              f"({stats['saved']} saved by merging equivalent configs)")
+    if prune_stats:
+        print()
+
+    ranks = np.array([rank_balances(b) for b in balances])
+    order = combined_order(ranks, args.sort)
+
+    print("="*80)
+    print(f"TOP {args.top} CONFIGURATIONS BY {args.sort.upper()} RANK ACROSS DATASETS")
+    print("="*80)
+    header = f"{'#':<5} {'Worst':<7} {'Mean':<9} "
+    header += " ".join(f"{label[:17] + ' rank':<23} {'$':<9}" for label in labels)
+    print(header + " Config")
+    print("-" * (len(header) + 40))
+    for row, i in enumerate(order[:args.top], 1):
+        line = f"{row:<5} {ranks[:, i].max():<7} {ranks[:, i].mean():<9.1f} "
+        line += " ".join(f"{ranks[d, i]:<23} ${balances[d, i]:<8.2f}" for d in range(len(datasets)))
+        print(line + f" {config_to_string(configs[i])}")
+
+    print("\nBest config per dataset:")
+    for d, label in enumerate(labels):
+        best = int(np.flatnonzero(ranks[d] == 1)[0])
+        others = ", ".join(f"#{ranks[o, best]} on {labels[o]}" for o in range(len(datasets)) if o != d)
+        print(f"   {label}: ${balances[d, best]:.2f}  {config_to_string(configs[best])}"
+              + (f"  ({others})" if others else ""))
+
+    if len(datasets) > 1:
+        # Spearman correlation: Pearson correlation of the rank vectors, with tied
+        # balances sharing their average rank (the report's index tie-break would bias it)
+        correlation = np.corrcoef([average_ranks(-b) for b in balances])
+        print("\nRank correlation between datasets (Spearman):")
+        for d, label in enumerate(labels):
+            print(f"   {label:<24} " + " ".join(f"{correlation[d, o]:>7.3f}" for o in range(len(datasets))))
+
+    combined = []
+    for i in order[:args.save_top]:
+        combined.append({
+            'config': configs[i],
+            'config_str': config_to_string(configs[i]),
+            'worst_rank': int(ranks[:, i].max()),
+            'mean_rank': float(ranks[:, i].mean()),
+            'datasets': {
+                label: {
+                    'rank': int(ranks[d, i]),
+                    'final_balance': float(balances[d, i]),
+                    'total_trades': int(trades[d, i]),
+                    'win_rate': float(win_rates[d, i]),
+                    'max_drawdown': float(drawdowns[d, i]),
+                }
+                for d, label in enumerate(labels)
+            },
+        })
+
+    with open(args.output, 'w') as f:
+        json.dump({
+            'datasets': [{'label': label, 'path': path} for label, path in zip(labels, args.datasets)],
+            'sort': args.sort,
+            'configs_tested': len(configs),
+            'results': combined,
+        }, f, indent=2)
+    print(f"\nCombined results saved to {args.output}")
+
+if __name__ == '__main__':
+    main()
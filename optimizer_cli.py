@@ -0,0 +1,281 @@
+"""
+Shared command line and sweep orchestration for the BTC Scalper optimizers
+analyze_optimal_config.py and analyze_with_backup_data.py parse the same options
+and run the grid through run_grid, so checkpoints, result files, the results
+cache, tensors, shards and the Pareto frontier behave the same in both
+"""
+
+import argparse
+import json
+import os
+import sys
+
+from backtest_engine import slice_windows
+from pareto import DEFAULT_OBJECTIVES, OBJECTIVES, FrontierCollector, parse_objectives
+from result_tensor import ResultTensor
+from results_cache import DEFAULT_CACHE, MAX_ENTRIES as CACHE_MAX_ENTRIES, ResultsCache, cached_sweep
+from results_file import ResultsWriter
+from sweep import resolve_workers, run_sweep
+from sweep_checkpoint import StateRecorder, load_checkpoint
+from sweep_results import ResultAggregator, result_record
+from sweep_shards import merge_shards, parse_shard, save_shard, shard_indices, shard_path
+from trade_stream import BATCH_SIZE as STREAM_BATCH_SIZE
+
+def output_paths(suffix=''):
+    """Default output locations of an optimizer; suffix keeps two optimizers' files apart"""
+    return {
+        'results': f'data/optimization_results{suffix}.json',
+        'pareto': f'data/optimization_results{suffix}_pareto.json',
+        'all_results': f'data/optimization_results{suffix}.ndjson',
+        'tensor': f'data/result_tensor{suffix}',
+        'shards': f'data/shards{suffix}',
+        'profile': f'data/optimizer{suffix}.prof',
+    }
+
+def parse_args(description, suffix=''):
+    """Optimizer command line; args.outputs holds the output_paths(suffix) defaults"""
+    outputs = output_paths(suffix)
+    parser = argparse.ArgumentParser(description=description)
+    parser.set_defaults(outputs=outputs)
+    parser.add_argument('--workers', type=int, default=1,
+                        help='worker processes for the config sweep (0 = one per core)')
+    source = parser.add_mutually_exclusive_group()
+    source.add_argument('--store', metavar='DIR',
+                        help='read trades from a columnar store written by trade_store.py instead of JSON')
+    source.add_argument('--db', metavar='PATH', nargs='?', const='data/trades.db',
+                        help='read trades from the bot\'s SQLite database (default data/trades.db)')
+    source.add_argument('--stream', metavar='BATCH', type=int, nargs='?', const=STREAM_BATCH_SIZE,
+                        help='decode the JSON export incrementally in batches of BATCH trades '
+                             f'(default {STREAM_BATCH_SIZE}) instead of loading it whole')
+    parser.add_argument('--days', type=float,
+                        help='with --db, only load windows from the last N days')
+    parser.add_argument('--checkpoint', metavar='PATH',
+                        help='resume every config from this sweep checkpoint (if it still matches the data) '
+                             'and save the new end states to it')
+    mode = parser.add_mutually_exclusive_group()
+    mode.add_argument('--exact', action='store_true', default=True,
+                      help='replay balances trade by trade, bit-identical to simulate_with_config (the default)')
+    mode.add_argument('--fast', dest='exact', action='store_false',
+                      help='compound in log space instead; final balances can differ in the last digits')
+    parser.add_argument('--no-prune', dest='prune', action='store_false',
+                        help='simulate every config, even those executing the same trades as another')
+    parser.add_argument('--cache', metavar='PATH', nargs='?', const=DEFAULT_CACHE,
+                        help='reuse results cached for this exact trade data and only simulate new configs '
+                             f'(default {DEFAULT_CACHE})')
+    parser.add_argument('--cache-max-entries', type=int, default=CACHE_MAX_ENTRIES,
+                        help='least recently used cache rows beyond this are evicted after the run')
+    parser.add_argument('--tensor', metavar='DIR', nargs='?', const=outputs['tensor'],
+                        help='save every config\'s metrics as a dense grid tensor of memory-mappable .npy files '
+                             f'(default {outputs["tensor"]}, _shard_I_of_N appended with --shard); '
+                             'query it with result_tensor.py')
+    parser.add_argument('--all-results', metavar='PATH', nargs='?', const=outputs['all_results'],
+                        help='also write every config\'s result, as it is evaluated, to a compact NDJSON '
+                             f'file (default {outputs["all_results"]}, _shard_I_of_N before the extension with '
+                             '--shard); see results_file.py')
+    parser.add_argument('--pareto', metavar='OBJECTIVES', nargs='?', const=','.join(DEFAULT_OBJECTIVES),
+                        help='also report the configs no other config beats on all of these comma-separated '
+                             f'objectives (default {",".join(DEFAULT_OBJECTIVES)}; also win_rate, profit_factor) '
+                             f'and save them to {outputs["pareto"]}')
+    parser.add_argument('--shard', metavar='I/N',
+                        help='only sweep shard I of N (1-based) of the config grid and save its partial '
+                             'top-K and group stats instead of reporting')
+    parser.add_argument('--shard-output', metavar='PATH',
+                        help=f'where --shard saves its results (default {outputs["shards"]}/shard_I_of_N.json)')
+    parser.add_argument('--merge', metavar='SHARD', nargs='+',
+                        help='combine the files of every --shard run into the full report, without simulating')
+    parser.add_argument('--profile', metavar='PATH', nargs='?', const=outputs['profile'],
+                        help=f'cProfile the run and write the stats to PATH (default {outputs["profile"]}); '
+                             'only the main process is profiled')
+    args = parser.parse_args()
+    if args.days is not None and not args.db:
+        parser.error('--days only applies to --db')
+    if args.shard:
+        try:
+            parse_shard(args.shard)
+        except ValueError as e:
+            parser.error(str(e))
+        if args.checkpoint or args.merge:
+            parser.error('--shard cannot be combined with --checkpoint or --merge')
+        if args.pareto:
+            parser.error('--shard saves no frontier; a shard\'s Pareto set is not the grid\'s')
+        # Each shard only fills its own configs, so concurrent shards must not share the default files
+        index, count = parse_shard(args.shard)
+        tag = f'_shard_{index}_of_{count}'
+        if args.tensor == outputs['tensor']:
+            args.tensor += tag
+        if args.all_results == outputs['all_results']:
+            root, ext = os.path.splitext(args.all_results)
+            args.all_results = root + tag + ext
+    if args.pareto:
+        try:
+            args.pareto = parse_objectives(args.pareto)
+        except ValueError as e:
+            parser.error(str(e))
+    if args.merge and (args.checkpoint or args.cache or args.tensor or args.all_results or args.pareto):
+        parser.error('--merge only reads shard results; it cannot be combined with options for a sweep')
+    return args
+
+def sweep_grid(args, timer, trade_arrays, configs, config_to_string, indices=None, frontier=None,
+               traded_only=False):
+    """
+    Simulate configs (or only configs[indices], for a shard) into a ResultAggregator
+
+    With traded_only the aggregator's group statistics skip configs that
+    never traded.
+    """
+    window_starts = trade_arrays['window_starts']
+    workers = resolve_workers(args.workers)
+    if workers > 1:
+        print(f"Running sweep on {workers} worker processes...")
+
+    # Incremental mode: only replay windows appended since the checkpoint
+    sweep_arrays = trade_arrays
+    start_states = None
+    recorder = None
+    if args.checkpoint:
+        with timer.stage('checkpoint'):
+            resume = load_checkpoint(args.checkpoint, trade_arrays, configs, args.exact)
+        if resume:
+            first_window, start_states = resume
+            sweep_arrays = slice_windows(trade_arrays, first_window)
+            print(f"Resuming from checkpoint: {len(window_starts) - first_window} new windows to replay")
+        recorder = StateRecorder(len(configs))
+
+    sweep_configs = configs if indices is None else [configs[i] for i in indices]
+    writer = ResultsWriter(args.all_results, config_to_string, len(configs)) if args.all_results else None
+    tensor = ResultTensor.for_configs(configs) if args.tensor else None
+    cache = ResultsCache(args.cache, args.cache_max_entries) if args.cache else None
+
+    # Only the top 100 and the running group stats are kept, whatever the grid size
+    aggregator = ResultAggregator(top_k=100, traded_only=traded_only)
+    with timer.stage('simulate'):
+        sweep_stats = {}
+        if cache is not None:
+            sweep = cached_sweep(cache, trade_arrays, sweep_configs, workers, start_states=start_states, exact=args.exact,
+                                 prune=args.prune, stats=sweep_stats, sweep_arrays=sweep_arrays)
+        else:
+            sweep = run_sweep(sweep_arrays, sweep_configs, workers, start_states=start_states, exact=args.exact,
+                              prune=args.prune, stats=sweep_stats)
+        for done, (i, result) in enumerate(sweep, 1):
+            if done % 10000 == 0:
+                print(f"Tested {done}/{len(sweep_configs)} configurations...")
+            if indices is not None:
+                i = indices[i]
+
+            aggregator.add(i, configs[i], result)
+            if recorder:
+                recorder.record(i, result)
+            if writer:
+                writer.add(i, configs[i], result)
+            if tensor:
+                tensor.add(i, result)
+            if frontier:
+                frontier.add(i, result)
+
+    print(f"Completed testing {len(sweep_configs)} configurations!\n")
+    if cache is not None:
+        evicted = cache.evict()
+        cache.close()
+        print(f"Results cache {args.cache}: {sweep_stats['cache_hits']} configs reused, "
+              f"{sweep_stats['cache_misses']} simulated" + (f", {evicted} old rows evicted" if evicted else "") + "\n")
+    if 'simulations' in sweep_stats:
+        print(f"Equivalent configs merged: {sweep_stats['simulations']} simulations for "
+              f"{sweep_stats['configs']} configs ({sweep_stats['saved']} saved, "
+              f"{sweep_stats['distinct_selections']}/{sweep_stats['selections']} distinct trade selections)\n")
+
+    if writer:
+        writer.close()
+        print(f"All {writer.count} results written to {args.all_results}\n")
+    if tensor:
+        tensor.save(args.tensor)
+        print(f"Result tensor ({' x '.join(map(str, tensor.shape))}) saved to {args.tensor}\n")
+
+    if recorder:
+        with timer.stage('checkpoint'):
+            recorder.save(args.checkpoint, trade_arrays, configs, args.exact)
+        print(f"Sweep checkpoint saved to {args.checkpoint}\n")
+
+    return aggregator
+
+def run_grid(args, timer, trade_arrays, configs, config_to_string, traded_only=False):
+    """
+    Sweep the grid as the command line asks; returns (aggregator, frontier)
+
+    --merge combines saved shard results without simulating. --shard sweeps
+    one shard, saves it, prints the stage timings and returns (None, None):
+    there is nothing to report until the shards are merged. frontier is
+    None unless --pareto was given.
+    """
+    if args.merge:
+        try:
+            with timer.stage('merge'):
+                aggregator = merge_shards(args.merge, trade_arrays, configs)
+        except ValueError as e:
+            print(f"Cannot merge shards: {e}")
+            sys.exit(1)
+        print(f"Merged {len(args.merge)} shards: {aggregator.count} results\n")
+        return aggregator, None
+
+    if args.shard:
+        index, count = parse_shard(args.shard)
+        indices = shard_indices(configs, index, count)
+        print(f"Shard {index}/{count}: {len(indices)} of {len(configs)} configurations\n")
+        aggregator = sweep_grid(args, timer, trade_arrays, configs, config_to_string, indices,
+                                traded_only=traded_only)
+        path = args.shard_output or shard_path(index, count, args.outputs['shards'])
+        with timer.stage('serialize'):
+            save_shard(path, aggregator, index, count, trade_arrays, configs, args.exact)
+        print(f"Shard results saved to {path}; combine all {count} shards with --merge")
+        timer.report(configs=len(indices))
+        return None, None
+
+    frontier = FrontierCollector(len(configs), args.pareto) if args.pareto else None
+    aggregator = sweep_grid(args, timer, trade_arrays, configs, config_to_string, frontier=frontier,
+                            traded_only=traded_only)
+    return aggregator, frontier
+
+def report_pareto(args, timer, frontier, configs, config_to_string, width=120):
+    """Print the --pareto frontier (top 20) and return its results, best final balance first"""
+    with timer.stage('pareto'):
+        pareto_results = []
+        for i in frontier.frontier():
+            result = frontier.result(i)
+            result['config'] = configs[i]
+            result['config_index'] = i
+            result['config_str'] = config_to_string(configs[i])
+            pareto_results.append(result)
+
+    print("\n" + "="*80)
+    print(f"PARETO FRONTIER ({', '.join(args.pareto).upper()}): "
+          f"{len(pareto_results)} of {frontier.filled.sum()} configs")
+    print("="*80)
+    print(f"{'#':<6} {'Final $':<10} {'Trades':<8} {'Win%':<8} {'PF':<8} {'MinBal':<10} Config")
+    print("-" * width)
+    for i, result in enumerate(pareto_results[:20], 1):
+        pf_str = f"{result['profit_factor']:.2f}" if result['profit_factor'] != float('inf') else "inf"
+        print(f"{i:<6} ${result['final_balance']:<9.2f} {result['total_trades']:<8} "
+              f"{result['win_rate']*100:<7.1f}% {pf_str:<8} ${result['max_drawdown']:<9.2f} "
+              f"{result['config_str']}")
+    if len(pareto_results) > 20:
+        print(f"... {len(pareto_results) - 20} more in {args.outputs['pareto']}")
+    return pareto_results
+
+def save_results(args, timer, results, frontier=None, pareto_results=None):
+    """Write the top 100 results, and the --pareto frontier if there is one, to the optimizer's JSON files"""
+    path = args.outputs['results']
+    with timer.stage('serialize'), open(path, 'w') as f:
+        # Save top 100 results (without trade history to keep file size down)
+        top_results = [result_record(r) for r in results[:100]]
+        json.dump(top_results, f, indent=2)
+
+    print(f"\nFull results saved to {path}")
+
+    if pareto_results is not None:
+        path = args.outputs['pareto']
+        with timer.stage('serialize'), open(path, 'w') as f:
+            json.dump({
+                'objectives': [OBJECTIVES[name] for name in args.pareto],
+                'configs_tested': int(frontier.filled.sum()),
+                'frontier': [dict(result_record(r), config_index=r['config_index']) for r in pareto_results],
+            }, f, indent=2)
+        print(f"Pareto frontier ({len(pareto_results)} configs) saved to {path}")
@@ -0,0 +1,155 @@
+"""
+Multi-objective ranking for the BTC Scalper config sweep
+Collects a few metrics per config as the sweep streams by and extracts the
+non-dominated (Pareto) frontier with an O(n log n) sort-and-sweep, so a config
+that tops balance with an unacceptable drawdown can be weighed against the rest
+"""
+
+from bisect import bisect_left
+
+import numpy as np
+
+# Objective name -> result key; every objective is maximized (max_drawdown is the lowest balance reached)
+OBJECTIVES = {
+    'balance': 'final_balance',
+    'drawdown': 'max_drawdown',
+    'trades': 'total_trades',
+    'win_rate': 'win_rate',
+    'profit_factor': 'profit_factor',
+}
+
+DEFAULT_OBJECTIVES = ('balance', 'drawdown', 'trades')
+
+def parse_objectives(spec):
+    """'balance,drawdown' -> ('balance', 'drawdown'); two or three known names"""
+    names = tuple(name.strip() for name in spec.split(',') if name.strip())
+    unknown = [name for name in names if name not in OBJECTIVES]
+    if unknown:
+        raise ValueError(f"Unknown objective(s) {', '.join(unknown)}; choose from {', '.join(OBJECTIVES)}")
+    if not 2 <= len(names) <= 3 or len(set(names)) != len(names):
+        raise ValueError("Give two or three distinct objectives")
+    return names
+
+def _front_2d(f1, f2):
+    # Sorted by f1 desc, a point is dominated by a strictly better f1 with f2 at least as good,
+    # or by an equal f1 with a strictly better f2
+    order = np.lexsort((-f2, -f1))
+    f1s, f2s = f1[order], f2[order]
+    new_group = np.ones(len(order), dtype=bool)
+    new_group[1:] = f1s[1:] != f1s[:-1]
+    group = np.cumsum(new_group) - 1
+    group_best = f2s[new_group]
+    better_before = np.empty_like(group_best)
+    better_before[0] = -np.inf
+    better_before[1:] = np.maximum.accumulate(group_best)[:-1]
+
+    dominated = (f2s <= better_before[group]) | (f2s < group_best[group])
+    front = np.empty(len(order), dtype=bool)
+    front[order] = ~dominated
+    return front
+
+def _front_3d(f1, f2, f3):
+    # Sweep f1 groups in descending order against a staircase of the (f2, f3) points seen so
+    # far: sorted by f2 ascending, so f3 is descending and the first entry at or right of a
+    # point's f2 holds the best f3 it could be dominated by
+    order = np.lexsort((-f3, -f2, -f1))
+    f1s, f2s, f3s = f1[order].tolist(), f2[order].tolist(), f3[order].tolist()
+    stair_f2 = []
+    stair_f3 = []
+    dominated = np.zeros(len(order), dtype=bool)
+
+    start = 0
+    while start < len(order):
+        end = start
+        while end < len(order) and f1s[end] == f1s[start]:
+            end += 1
+
+        # Within the group (equal f1) a point needs a strictly better f2 or f3 to be
+        # dominated; points of earlier groups only need to be at least as good
+        best_f3_before = -np.inf  # best f3 among group points with a strictly greater f2
+        run_f2 = run_top = None
+        survivors = []
+        for k in range(start, end):
+            x, y = f2s[k], f3s[k]
+            if x != run_f2:
+                if run_f2 is not None:
+                    best_f3_before = max(best_f3_before, run_top)
+                run_f2, run_top = x, y
+            if y < run_top or y <= best_f3_before:
+                dominated[k] = True
+                continue
+            pos = bisect_left(stair_f2, x)
+            if pos < len(stair_f2) and stair_f3[pos] >= y:
+                dominated[k] = True
+                continue
+            survivors.append((x, y))
+        start = end
+
+        for x, y in survivors:
+            pos = bisect_left(stair_f2, x)
+            if pos < len(stair_f2) and stair_f3[pos] >= y:
+                continue
+            # Drop staircase points the new one covers: f2 <= x and f3 <= y sit just left of pos
+            left = pos
+            while left > 0 and stair_f3[left - 1] <= y:
+                left -= 1
+            if pos < len(stair_f2) and stair_f2[pos] == x:
+                pos += 1
+            stair_f2[left:pos] = [x]
+            stair_f3[left:pos] = [y]
+
+    front = np.empty(len(order), dtype=bool)
+    front[order] = ~dominated
+    return front
+
+def pareto_front(points):
+    """
+    Boolean mask of the non-dominated rows of an (n, 2) or (n, 3) array, every column maximized
+
+    A row is dominated when another is at least as good in every column
+    and better in one; identical rows never dominate each other.
+    O(n log n): one sort plus a sweep (vectorized for two objectives, a
+    bisected staircase for three).
+    """
+    points = np.asarray(points, dtype=np.float64)
+    if len(points) == 0:
+        return np.zeros(0, dtype=bool)
+    if points.shape[1] == 2:
+        return _front_2d(points[:, 0], points[:, 1])
+    if points.shape[1] == 3:
+        return _front_3d(points[:, 0], points[:, 1], points[:, 2])
+    raise ValueError("pareto_front takes two or three objectives")
+
+# Metrics kept per config so frontier rows can be written without re-simulating
+_KEPT = ('final_balance', 'total_trades', 'win_rate', 'max_drawdown', 'profit_factor',
+         'gross_wins', 'gross_losses')
+
+class FrontierCollector:
+    """
+    Streams sweep results into fixed-size metric columns (56 bytes per config)
+
+    Configs never added (e.g. other shards) are left out of the frontier.
+    """
+
+    def __init__(self, n_configs, objectives=DEFAULT_OBJECTIVES):
+        self.objectives = tuple(objectives)
+        self.columns = {key: np.full(n_configs, np.nan) for key in _KEPT}
+        self.filled = np.zeros(n_configs, dtype=bool)
+
+    def add(self, index, result):
+        for key, values in self.columns.items():
+            values[index] = result[key]
+        self.filled[index] = True
+
+    def frontier(self):
+        """Config indices on the frontier, best final_balance first (ties to the lower index)"""
+        indices = np.flatnonzero(self.filled)
+        points = np.column_stack([self.columns[OBJECTIVES[name]][indices] for name in self.objectives])
+        front = indices[pareto_front(points)]
+        return front[np.lexsort((front, -self.columns['final_balance'][front]))].tolist()
+
+    def result(self, index):
+        """Result dict (the kept metrics) of one config"""
+        result = {key: values[index].item() for key, values in self.columns.items()}
+        result['total_trades'] = int(result['total_trades'])
+        return result
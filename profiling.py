@@ -0,0 +1,82 @@
+"""
+Stage timing and profiling helpers for the BTC Scalper optimizers
+Wall-clock timers around the optimizer stages, peak memory, and an optional
+cProfile dump, so a slow sweep can be narrowed down without editing code
+"""
+
+import cProfile
+import pstats
+import sys
+import time
+from contextlib import contextmanager
+
+def peak_rss_mb():
+    """Peak resident set size of this process in MB, or None if it can't be measured"""
+    try:
+        import resource
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        # ru_maxrss is bytes on macOS and kilobytes elsewhere
+        return peak / (1024 * 1024) if sys.platform == 'darwin' else peak / 1024
+    except ImportError:
+        pass
+    try:
+        import psutil
+        info = psutil.Process().memory_info()
+        return getattr(info, 'peak_wset', info.rss) / (1024 * 1024)
+    except ImportError:
+        return None
+
+class StageTimer:
+    """Accumulated wall-clock seconds per named stage, in first-seen order"""
+
+    def __init__(self):
+        self.timings = {}
+
+    @contextmanager
+    def stage(self, name):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.timings[name] = self.timings.get(name, 0.0) + time.perf_counter() - start
+
+    def report(self, configs=None):
+        """Print each stage's time and share of the total, sweep throughput and peak memory"""
+        total = sum(self.timings.values())
+        print("\n" + "="*80)
+        print("STAGE TIMINGS")
+        print("="*80)
+        for name, seconds in self.timings.items():
+            share = seconds / total * 100 if total > 0 else 0.0
+            print(f"   {name:<10} {seconds*1000:>10.1f} ms  {share:>5.1f}%")
+        print(f"   {'total':<10} {total*1000:>10.1f} ms")
+        simulate = self.timings.get('simulate')
+        if configs and simulate:
+            print(f"   Throughput: {configs / simulate:,.0f} configs/sec")
+        peak = peak_rss_mb()
+        if peak is not None:
+            print(f"   Peak RSS:   {peak:.1f} MB (main process)")
+
+@contextmanager
+def profile_to(path, top=25):
+    """
+    cProfile the enclosed block, dump the stats to path (None = don't profile)
+
+    The dump loads in pstats, snakeviz or gprof2dot; the top functions by
+    cumulative time are also printed. Only this process is profiled, so run
+    the sweep with one worker to see the simulation itself.
+    """
+    if not path:
+        yield
+        return
+    profiler = cProfile.Profile()
+    profiler.enable()
+    try:
+        yield
+    finally:
+        profiler.disable()
+        profiler.dump_stats(path)
+        print("\n" + "="*80)
+        print(f"PROFILE (top {top} by cumulative time, full stats in {path})")
+        print("="*80)
+        pstats.Stats(profiler).sort_stats('cumulative').print_stats(top)
@@ -0,0 +1,170 @@
+"""
+Dense result tensor for the BTC Scalper config sweep
+Stores sweep metrics as N-dimensional arrays with one axis per config dimension,
+saved as memory-mappable .npy files, so any marginal or 2-D slice of the grid
+is a single NumPy reduction after the run
+
+Usage:
+    python result_tensor.py data/result_tensor                              # avg/max per dimension
+    python result_tensor.py data/result_tensor --by min_minute max_minute --how max
+    python result_tensor.py data/result_tensor --by portfolio_pct --metric total_trades
+"""
+
+import argparse
+import json
+import os
+import warnings
+
+import numpy as np
+
+TENSOR_FORMAT = 1
+
+# One axis per generate_all_configs dimension, in grid order
+AXES = ('min_minute', 'max_minute', 'portfolio_pct', 'max_buy_price', 'stop_on_flip',
+        'stop_after_n_losses', 'max_trades_per_window', 'first_direction_only')
+
+# Metric tensors; cells with no config (e.g. min_minute > max_minute) hold NaN
+METRICS = ('final_balance', 'total_trades', 'win_rate', 'max_drawdown')
+
+_REDUCERS = {
+    'mean': np.nanmean,
+    'max': np.nanmax,
+    'min': np.nanmin,
+    'count': lambda values, axis: np.sum(~np.isnan(values), axis=axis),
+}
+
+class ResultTensor:
+    """
+    Sweep metrics laid out on the config grid
+
+    axes maps each AXES name to its values, in grid order; arrays holds one
+    tensor per METRICS name plus 'config_index' (-1 where no config exists).
+    """
+
+    def __init__(self, axes, arrays):
+        self.axes = axes
+        self.arrays = arrays
+        self._flat = None
+
+    @classmethod
+    def for_configs(cls, configs):
+        """Empty tensor shaped for a config list, ready for add()"""
+        axes = {name: [] for name in AXES}
+        for config in configs:
+            for name in AXES:
+                if config[name] not in axes[name]:
+                    axes[name].append(config[name])
+
+        positions = {name: {value: k for k, value in enumerate(values)} for name, values in axes.items()}
+        shape = tuple(len(axes[name]) for name in AXES)
+        coords = np.array([[positions[name][config[name]] for name in AXES] for config in configs],
+                          dtype=np.int64).reshape(-1, len(AXES))
+        flat = np.ravel_multi_index(coords.T, shape)
+
+        arrays = {name: np.full(shape, np.nan) for name in METRICS}
+        arrays['config_index'] = np.full(shape, -1, dtype=np.int64)
+        arrays['config_index'].reshape(-1)[flat] = np.arange(len(configs))
+
+        tensor = cls(axes, arrays)
+        tensor._flat = flat
+        return tensor
+
+    @property
+    def shape(self):
+        return self.arrays['config_index'].shape
+
+    def add(self, index, result):
+        """Store the result of configs[index]"""
+        cell = self._flat[index]
+        for name in METRICS:
+            self.arrays[name].reshape(-1)[cell] = result[name]
+
+    def save(self, tensor_dir):
+        """One .npy per tensor plus meta.json with the axis values"""
+        os.makedirs(tensor_dir, exist_ok=True)
+        for name, values in self.arrays.items():
+            np.save(os.path.join(tensor_dir, f'{name}.npy'), values)
+        with open(os.path.join(tensor_dir, 'meta.json'), 'w') as f:
+            json.dump({'format': TENSOR_FORMAT, 'axes': [[name, self.axes[name]] for name in AXES]}, f, indent=2)
+
+    def axis(self, name):
+        return AXES.index(name)
+
+    def reduce(self, metric, keep=(), how='mean'):
+        """
+        Reduce a metric over every axis not in keep
+
+        Returns an array with one dimension per kept axis, in the order
+        given (a scalar for keep=()); how is 'mean', 'max', 'min' or 'count'.
+        """
+        values = np.asarray(self.arrays[metric], dtype=np.float64)
+        keep_axes = [self.axis(name) for name in keep]
+        other = tuple(k for k in range(len(AXES)) if k not in keep_axes)
+        with warnings.catch_warnings():
+            # Kept cells with no config at all (min_minute > max_minute) reduce to NaN
+            warnings.simplefilter('ignore', RuntimeWarning)
+            reduced = _REDUCERS[how](values, axis=other)
+        # Reduction leaves the kept axes in tensor order; reorder them as requested
+        order = np.argsort(np.argsort(keep_axes)) if keep_axes else []
+        return np.transpose(reduced, order) if len(keep_axes) > 1 else reduced
+
+    def marginal(self, metric, name, how='mean'):
+        """{axis value: reduced metric} for one axis"""
+        return dict(zip(self.axes[name], self.reduce(metric, (name,), how).tolist()))
+
+    def best(self, metric='final_balance'):
+        """Config index of the cell with the highest metric (ties to the lower index)"""
+        values = np.asarray(self.arrays[metric], dtype=np.float64)
+        index = np.asarray(self.arrays['config_index'])
+        filled = index >= 0
+        top = np.nanmax(values[filled])
+        return int(index[filled & (values == top)].min())
+
+def open_result_tensor(tensor_dir):
+    """Memory-map a saved tensor; nothing is read until it is reduced"""
+    with open(os.path.join(tensor_dir, 'meta.json'), 'r') as f:
+        meta = json.load(f)
+    if meta.get('format') != TENSOR_FORMAT:
+        raise ValueError(f"Unsupported result tensor format in {tensor_dir}: {meta.get('format')}")
+    axes = {name: values for name, values in meta['axes']}
+    arrays = {name: np.load(os.path.join(tensor_dir, f'{name}.npy'), mmap_mode='r')
+              for name in METRICS + ('config_index',)}
+    return ResultTensor(axes, arrays)
+
+def _label(value):
+    return "None" if value is None else str(value)
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('path', help='tensor directory written with --tensor')
+    parser.add_argument('--metric', choices=METRICS, default='final_balance')
+    parser.add_argument('--by', nargs='+', choices=AXES, help='one axis for a marginal, two for a 2-D table')
+    parser.add_argument('--how', choices=list(_REDUCERS), help='reduction (default: mean and max)')
+    args = parser.parse_args()
+
+    tensor = open_result_tensor(args.path)
+    configs = int((np.asarray(tensor.arrays['config_index']) >= 0).sum())
+    print(f"{configs} configs on a {' x '.join(map(str, tensor.shape))} grid in {args.path}")
+
+    if args.by and len(args.by) > 2:
+        parser.error('--by takes one or two axes')
+
+    if args.by and len(args.by) == 2:
+        rows, cols = args.by
+        how = args.how or 'mean'
+        table = tensor.reduce(args.metric, (rows, cols), how)
+        print(f"\n{how} {args.metric} by {rows} (rows) x {cols} (columns)")
+        print(f"{'':>8} " + " ".join(f"{_label(v):>9}" for v in tensor.axes[cols]))
+        for value, row in zip(tensor.axes[rows], table):
+            print(f"{_label(value):>8} " + " ".join("        -" if np.isnan(x) else f"{x:>9.2f}" for x in row))
+        return
+
+    hows = [args.how] if args.how else ['mean', 'max']
+    for name in args.by or AXES:
+        print(f"\n{name}:")
+        stats = {how: tensor.marginal(args.metric, name, how) for how in hows}
+        for value in tensor.axes[name]:
+            print(f"   {_label(value):>8}: " + ", ".join(f"{how} {stats[how][value]:.2f}" for how in hows))
+
+if __name__ == '__main__':
+    main()
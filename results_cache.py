@@ -0,0 +1,178 @@
+"""
+Persistent sweep results cache for the BTC Scalper optimizers
+Maps (dataset fingerprint, canonical config key, compounding mode) to the
+metrics a simulation returned, in a local SQLite file, so a repeated or
+extended sweep only simulates the configs it has not seen on this exact data
+"""
+
+import sqlite3
+
+from results_file import CONFIG_FIELDS
+from sweep import run_sweep
+from sweep_checkpoint import windows_digest
+
+DEFAULT_CACHE = 'data/results_cache.db'
+
+# Bump when the engine's results change meaning, to orphan older rows
+CACHE_VERSION = 1
+
+# Result rows kept after a run (~110 bytes each); least recently used datasets are evicted past this
+MAX_ENTRIES = 2_000_000
+
+METRIC_COLUMNS = ('final_balance', 'total_trades', 'winning_trades', 'win_rate', 'max_drawdown',
+                  'profit_factor', 'gross_wins', 'gross_losses')
+
+def dataset_fingerprint(arrays):
+    """SHA-256 of every trade in the arrays (see sweep_checkpoint.windows_digest)"""
+    return windows_digest(arrays, len(arrays['window_starts']))
+
+def config_key(config):
+    """Canonical text key of a config: its grid fields in a fixed order, e.g. '1|13|0.02|50|False|None|3|False'"""
+    return '|'.join([str(config[field]) for field in CONFIG_FIELDS])
+
+class ResultsCache:
+    """
+    SQLite store of sweep results
+
+    Every open advances a use clock that stamps each dataset fingerprint
+    looked up or written. A fingerprint goes stale as a whole once new
+    trades land, so evict() drops the rows of the least recently used
+    fingerprints until at most max_entries rows remain (never the most
+    recent one).
+    """
+
+    def __init__(self, path=DEFAULT_CACHE, max_entries=MAX_ENTRIES):
+        self.path = path
+        self.max_entries = max_entries
+        self.conn = sqlite3.connect(path)
+        self.conn.execute("PRAGMA journal_mode = WAL")
+        self.conn.execute("CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value INTEGER)")
+        self.conn.execute(f"""
+            CREATE TABLE IF NOT EXISTS results (
+                dataset TEXT NOT NULL,
+                mode TEXT NOT NULL,
+                config TEXT NOT NULL,
+                {', '.join(f'{column} REAL' for column in METRIC_COLUMNS)},
+                PRIMARY KEY (dataset, mode, config)
+            ) WITHOUT ROWID""")
+        self.conn.execute("""
+            CREATE TABLE IF NOT EXISTS datasets (
+                dataset TEXT NOT NULL,
+                mode TEXT NOT NULL,
+                used INTEGER NOT NULL,
+                PRIMARY KEY (dataset, mode)
+            )""")
+        self.conn.execute("INSERT OR IGNORE INTO meta VALUES ('clock', 0)")
+        self.conn.execute("UPDATE meta SET value = value + 1 WHERE key = 'clock'")
+        self.clock = self.conn.execute("SELECT value FROM meta WHERE key = 'clock'").fetchone()[0]
+        self.conn.commit()
+
+    @staticmethod
+    def _mode(exact):
+        return f"v{CACHE_VERSION}-{'exact' if exact else 'log'}"
+
+    def _touch(self, dataset, mode):
+        self.conn.execute("INSERT OR REPLACE INTO datasets VALUES (?, ?, ?)", (dataset, mode, self.clock))
+
+    def lookup(self, dataset, configs, exact=False):
+        """{config_index: result} for every config cached for this dataset and mode"""
+        wanted = {}
+        for i, config in enumerate(configs):
+            wanted.setdefault(config_key(config), []).append(i)
+
+        hits = {}
+        rows = self.conn.execute(
+            f"SELECT config, {', '.join(METRIC_COLUMNS)} FROM results WHERE dataset = ? AND mode = ?",
+            (dataset, self._mode(exact)))
+        for row in rows:
+            indices = wanted.get(row[0])
+            if indices is None:
+                continue
+            result = dict(zip(METRIC_COLUMNS, row[1:]))
+            result['total_trades'] = int(result['total_trades'])
+            result['winning_trades'] = int(result['winning_trades'])
+            if result['profit_factor'] is None:
+                result['profit_factor'] = float('inf')
+            for i in indices:
+                hits[i] = dict(result)
+
+        self._touch(dataset, self._mode(exact))
+        self.conn.commit()
+        return hits
+
+    def store(self, dataset, items, exact=False):
+        """Insert or refresh (config, result) pairs"""
+        mode = self._mode(exact)
+        rows = []
+        for config, result in items:
+            values = [result[column] for column in METRIC_COLUMNS]
+            if values[METRIC_COLUMNS.index('profit_factor')] == float('inf'):
+                values[METRIC_COLUMNS.index('profit_factor')] = None
+            rows.append((dataset, mode, config_key(config), *values))
+        self.conn.executemany(
+            f"INSERT OR REPLACE INTO results VALUES ({', '.join('?' * (len(METRIC_COLUMNS) + 3))})", rows)
+        self._touch(dataset, mode)
+        self.conn.commit()
+
+    def __len__(self):
+        return self.conn.execute("SELECT COUNT(*) FROM results").fetchone()[0]
+
+    def evict(self):
+        """Drop the least recently used datasets' rows while over max_entries; returns rows removed"""
+        total = len(self)
+        removed = 0
+        stale = self.conn.execute("SELECT dataset, mode FROM datasets ORDER BY used").fetchall()[:-1]
+        for dataset, mode in stale:
+            if total - removed <= self.max_entries:
+                break
+            removed += self.conn.execute("DELETE FROM results WHERE dataset = ? AND mode = ?",
+                                         (dataset, mode)).rowcount
+            self.conn.execute("DELETE FROM datasets WHERE dataset = ? AND mode = ?", (dataset, mode))
+        self.conn.commit()
+        return removed
+
+    def close(self):
+        self.conn.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+# New results are written to the cache in batches of this many
+STORE_BATCH = 20000
+
+def cached_sweep(cache, trade_arrays, configs, workers=1, start_states=None, exact=False, prune=True,
+                 stats=None, sweep_arrays=None):
+    """
+    run_sweep with the results cache in front: yields (config_index, result)
+
+    Cached configs are yielded first, then only the missing ones are
+    simulated and written back. Results are keyed by the fingerprint of
+    trade_arrays (the full data); when resuming from a checkpoint pass the
+    sliced windows as sweep_arrays with their start_states. stats, if
+    given, gets 'cache_hits' / 'cache_misses' plus run_sweep's prune counts.
+    """
+    dataset = dataset_fingerprint(trade_arrays)
+    hits = cache.lookup(dataset, configs, exact)
+    missing = [i for i in range(len(configs)) if i not in hits]
+    if stats is not None:
+        stats['cache_hits'] = len(hits)
+        stats['cache_misses'] = len(missing)
+
+    yield from hits.items()
+    if not missing:
+        return
+
+    missing_configs = [configs[i] for i in missing]
+    missing_states = [start_states[i] for i in missing] if start_states is not None else None
+    pending = []
+    for j, result in run_sweep(trade_arrays if sweep_arrays is None else sweep_arrays, missing_configs,
+                               workers, start_states=missing_states, exact=exact, prune=prune, stats=stats):
+        pending.append((missing_configs[j], result))
+        if len(pending) >= STORE_BATCH:
+            cache.store(dataset, pending, exact)
+            pending = []
+        yield missing[j], result
+    cache.store(dataset, pending, exact)
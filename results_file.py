@@ -0,0 +1,168 @@
+"""
+Compact all-configs results file for the BTC Scalper optimizers
+Newline-delimited JSON: one header line with the shared column schema, then
+one array per evaluated config, appended as the sweep produces them. Any
+config's score can be looked up by its config_to_string key without parsing
+the rest of the file
+
+Usage:
+    python results_file.py data/optimization_results.ndjson                       # top 10
+    python results_file.py data/optimization_results.ndjson "M1-13 | 2.0% | MaxPrice≤50¢ | Max3Trades"
+"""
+
+import argparse
+import json
+
+FORMAT = 'btc-scalper-sweep-results'
+VERSION = 1
+
+CONFIG_FIELDS = ('min_minute', 'max_minute', 'portfolio_pct', 'max_buy_price', 'stop_on_flip',
+                 'stop_after_n_losses', 'max_trades_per_window', 'first_direction_only')
+METRIC_FIELDS = ('final_balance', 'total_trades', 'win_rate', 'max_drawdown', 'profit_factor',
+                 'gross_wins', 'gross_losses')
+COLUMNS = ('config_str', 'config_index') + CONFIG_FIELDS + METRIC_FIELDS
+
+_KEY_COLUMNS = 2
+
+def _json_default(value):
+    # numpy scalars from the engine
+    return value.item()
+
+class ResultsWriter:
+    """
+    Appends one row per sweep result to an NDJSON results file
+
+    Rows are written in the order they arrive, so a parallel sweep's file
+    is not in config order; config_index is stored with every row. A run
+    that dies mid-sweep leaves a readable file of the rows written so far.
+    """
+
+    def __init__(self, path, key_fn, total_configs=None):
+        self.path = path
+        self.key_fn = key_fn
+        self.count = 0
+        self._encode = json.JSONEncoder(ensure_ascii=False, separators=(',', ':'),
+                                        default=_json_default).encode
+        self._file = open(path, 'w', encoding='utf-8', buffering=1 << 20)
+        self._file.write(self._encode({
+            'format': FORMAT,
+            'version': VERSION,
+            'columns': COLUMNS,
+            'total_configs': total_configs,
+        }) + '\n')
+
+    def add(self, index, config, result):
+        row = [self.key_fn(config), index]
+        row.extend(config[field] for field in CONFIG_FIELDS)
+        row.extend(result[field] for field in METRIC_FIELDS)
+        if row[-3] == float('inf'):
+            row[-3] = None  # profit_factor with no losses, as in result_record
+        self._file.write(self._encode(row) + '\n')
+        self.count += 1
+
+    def close(self):
+        self._file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+def _record(row):
+    """Row array -> dict shaped like result_record, plus config_index"""
+    config = dict(zip(CONFIG_FIELDS, row[_KEY_COLUMNS:_KEY_COLUMNS + len(CONFIG_FIELDS)]))
+    record = {'config': config, 'config_str': row[0], 'config_index': row[1]}
+    record.update(zip(METRIC_FIELDS, row[_KEY_COLUMNS + len(CONFIG_FIELDS):]))
+    return record
+
+class ResultsFile:
+    """
+    Read side of a results file: lookup by config_str, iteration, top N
+
+    Opening scans the file once and keeps only a key -> byte offset index;
+    get() then reads and decodes the one matching line.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self._file = open(path, 'rb')
+        self.header = json.loads(self._file.readline())
+        if self.header.get('format') != FORMAT:
+            raise ValueError(f"{path} is not a sweep results file")
+        if tuple(self.header['columns']) != COLUMNS:
+            raise ValueError(f"{path} has columns {self.header['columns']}, expected {list(COLUMNS)}")
+
+        decoder = json.JSONDecoder()
+        self._offsets = {}
+        offset = self._file.tell()
+        for line in self._file:
+            if line.endswith(b'\n'):  # a partial last line is a sweep that died mid-write
+                key, _ = decoder.raw_decode(line.decode('utf-8'), 1)
+                self._offsets[key] = offset
+            offset += len(line)
+
+    def __len__(self):
+        return len(self._offsets)
+
+    def __contains__(self, key):
+        return key in self._offsets
+
+    def get(self, key):
+        """Record for a config_to_string key, or None if it was not evaluated"""
+        offset = self._offsets.get(key)
+        if offset is None:
+            return None
+        self._file.seek(offset)
+        return _record(json.loads(self._file.readline()))
+
+    def __iter__(self):
+        """Every record, in file order"""
+        for offset in self._offsets.values():
+            self._file.seek(offset)
+            yield _record(json.loads(self._file.readline()))
+
+    def top(self, n=100):
+        """Best n records by final_balance (ties to the lower config index)"""
+        records = sorted(self, key=lambda r: (-r['final_balance'], r['config_index']))
+        return records[:n]
+
+    def close(self):
+        self._file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+def print_record(record):
+    pf = record['profit_factor']
+    print(f"{record['config_str']}")
+    print(f"   Final Balance: ${record['final_balance']:.2f}  Trades: {record['total_trades']}  "
+          f"Win Rate: {record['win_rate']*100:.1f}%  PF: {'inf' if pf is None else f'{pf:.2f}'}  "
+          f"Max Drawdown: ${record['max_drawdown']:.2f}")
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('path', help='results file written with --all-results')
+    parser.add_argument('keys', nargs='*', metavar='CONFIG', help='config_to_string keys to look up')
+    parser.add_argument('--top', type=int, default=10, help='rows to print when no keys are given')
+    args = parser.parse_args()
+
+    with ResultsFile(args.path) as results:
+        print(f"{len(results)} configs in {args.path}\n")
+        if not args.keys:
+            for rank, record in enumerate(results.top(args.top), 1):
+                print(f"#{rank} ", end='')
+                print_record(record)
+            return
+        for key in args.keys:
+            record = results.get(key)
+            if record is None:
+                print(f"{key}\n   not in results")
+            else:
+                print_record(record)
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,271 @@
+"""
+Config sweep runner for the BTC Scalper optimizers
+Runs the vectorized engine over a config list, either in-process or across a process pool
+that reads the trade arrays from shared memory
+"""
+
+import hashlib
+import os
+from collections import OrderedDict
+from functools import partial
+import multiprocessing as mp
+from multiprocessing import shared_memory
+
+import numpy as np
+
+from backtest_engine import SelectionCache, select_trades, selection_key, simulate_executed
+
+# Numeric columns published to the workers (window_starts / direction_labels / result_labels stay in the parent)
+SHARED_COLUMNS = [
+    'window_idx',
+    'window_counts',
+    'window_offsets',
+    'entry_minute',
+    'direction',
+    'buy_price_cents',
+    'is_win',
+    'odds',
+    'window_first_direction',
+    'window_max_price',
+    'losses_before',
+]
+
+# Per-process state set up by _init_worker
+_worker = {}
+
+def share_trade_arrays(arrays):
+    """Copy the numeric trade columns into a single shared memory block"""
+    layout = []
+    offset = 0
+    for column in SHARED_COLUMNS:
+        values = arrays[column]
+        # Keep every column 8-byte aligned inside the block
+        offset = (offset + 7) // 8 * 8
+        layout.append((column, values.dtype.str, values.shape, offset))
+        offset += values.nbytes
+
+    shm = shared_memory.SharedMemory(create=True, size=max(offset, 1))
+    for column, dtype, shape, col_offset in layout:
+        view = np.ndarray(shape, dtype=dtype, buffer=shm.buf, offset=col_offset)
+        view[...] = arrays[column]
+
+    return shm, layout
+
+def attach_trade_arrays(name, layout):
+    """Map the shared trade columns into this process without copying"""
+    # The parent owns the block and unlinks it when the sweep ends. Workers must not
+    # unregister it: they share the parent's resource tracker, so that would drop the
+    # parent's registration and make its unlink fail in the tracker with a KeyError.
+    try:
+        shm = shared_memory.SharedMemory(name=name, track=False)
+    except TypeError:
+        # Before Python 3.13 attaching always registers, which the shared tracker ignores
+        shm = shared_memory.SharedMemory(name=name)
+
+    arrays = {}
+    for column, dtype, shape, col_offset in layout:
+        arrays[column] = np.ndarray(shape, dtype=dtype, buffer=shm.buf, offset=col_offset)
+    return shm, arrays
+
+def _init_worker(blocks):
+    """Attach every dataset's shared block, given as [(shm_name, layout), ...]"""
+    _worker['shm'] = []
+    _worker['datasets'] = []
+    _worker['caches'] = []
+    for shm_name, layout in blocks:
+        shm, arrays = attach_trade_arrays(shm_name, layout)
+        _worker['shm'].append(shm)
+        _worker['datasets'].append(arrays)
+        _worker['caches'].append(SelectionCache())
+
+def group_by_selection(configs, start_states=None):
+    """
+    Collapse configs that only differ in portfolio_pct
+
+    Returns [(config, [(config_index, portfolio_pct, start_state), ...]), ...]
+    in first-seen order, which keeps groups sharing (min_minute, max_minute,
+    max_buy_price) next to each other for the engine's SelectionCache.
+    """
+    groups = {}
+    for i, config in enumerate(configs):
+        key = selection_key(config)
+        if key not in groups:
+            groups[key] = (config, [])
+        start = start_states[i] if start_states is not None else None
+        groups[key][1].append((i, config['portfolio_pct'], start))
+    return list(groups.values())
+
+# Results a sweep chunk remembers for reuse by later groups executing the same trades
+PRUNE_MEMO_RESULTS = 50000
+
+def selection_digest(executed):
+    """Digest of an executed-trade mask; selections with equal digests execute the same trades"""
+    return hashlib.blake2b(np.packbits(executed).tobytes(), digest_size=16).digest()
+
+def _run_groups(arrays, groups, cache, exact=False, stats=None):
+    """
+    Simulate selection groups, yielding (config_index, result) for every sizing
+
+    With stats (a dict), equivalent selections are pruned: each group's
+    executed mask is hashed as it is built, and a sizing already simulated
+    on the same trades with the same (portfolio_pct, start_state) gets a
+    copy of that result. Caps above every observed price, window size or
+    loss streak leave the selection unchanged, so much of the grid
+    collapses this way. Up to PRUNE_MEMO_RESULTS results are remembered,
+    least recently used first out. stats receives 'digests' (one per group)
+    and 'simulations'.
+    """
+    memo = OrderedDict()
+    for config, sizings in groups:
+        executed = select_trades(arrays, config, cache)
+        if stats is None:
+            results = simulate_executed(arrays, executed, [pct for _, pct, _ in sizings],
+                                        [start for _, _, start in sizings], exact)
+            for (i, _, _), result in zip(sizings, results):
+                yield i, result
+            continue
+
+        digest = selection_digest(executed)
+        stats.setdefault('digests', []).append(digest)
+        keys = [(digest, pct, start) for _, pct, start in sizings]
+        missing = list(dict.fromkeys(key for key in keys if key not in memo))
+        if missing:
+            results = simulate_executed(arrays, executed, [pct for _, pct, _ in missing],
+                                        [start for _, _, start in missing], exact)
+            memo.update(zip(missing, results))
+        stats['simulations'] = stats.get('simulations', 0) + len(missing)
+
+        for (i, _, _), key in zip(sizings, keys):
+            memo.move_to_end(key)
+            yield i, dict(memo[key])
+        while len(memo) > PRUNE_MEMO_RESULTS:
+            memo.popitem(last=False)
+
+def _prune_stats(groups, chunk_stats):
+    """run_sweep's prune counts from the stats of every chunk"""
+    configs = sum(len(sizings) for _, sizings in groups)
+    simulations = sum(stats['simulations'] for stats in chunk_stats)
+    return {
+        'configs': configs,
+        'selections': len(groups),
+        'distinct_selections': len({digest for stats in chunk_stats for digest in stats['digests']}),
+        'simulations': simulations,
+        'saved': configs - simulations,
+    }
+
+def _sweep_chunk(exact, prune, arrays, groups, cache):
+    """Simulate one chunk of selection groups; the chunk function behind run_sweep(s)"""
+    stats = {'digests': [], 'simulations': 0} if prune else None
+    return list(_run_groups(arrays, groups, cache, exact, stats)), stats
+
+def _run_task(task):
+    """Run one map_dataset_chunks task inside a worker"""
+    dataset, chunk_fn, groups = task
+    return dataset, chunk_fn(_worker['datasets'][dataset], groups, _worker['caches'][dataset])
+
+def resolve_workers(workers):
+    """--workers 0 means one worker per core"""
+    if not workers or workers < 0:
+        return os.cpu_count() or 1
+    return workers
+
+def map_dataset_chunks(datasets, groups, chunk_fn, workers=1, chunk_size=None, per_dataset=False):
+    """
+    Yield (dataset_index, chunk_fn(arrays, groups_chunk, cache)) over several datasets
+
+    The building block for passes over the grid: chunk_fn gets one
+    dataset's trade arrays (shared memory views inside workers), a list of
+    groups from group_by_selection and that dataset's SelectionCache. It
+    must be a module-level function, or a functools.partial of one, so it
+    can be pickled. groups is shared by every dataset, or with per_dataset
+    a list of group lists, one per dataset. With workers > 1 every dataset
+    is published to one pool and their chunks are interleaved, so all
+    sweeps progress together and results arrive out of order.
+    """
+    dataset_groups = groups if per_dataset else [groups] * len(datasets)
+    if workers <= 1:
+        for dataset, arrays in enumerate(datasets):
+            yield dataset, chunk_fn(arrays, dataset_groups[dataset], SelectionCache())
+        return
+
+    if chunk_size is None:
+        # A few chunks per worker keeps the pool busy without flooding the result queue
+        total = sum(len(g) for g in dataset_groups)
+        chunk_size = max(1, min(2000, total // (workers * 8) or 1))
+    longest = max((len(g) for g in dataset_groups), default=0)
+    tasks = [(dataset, chunk_fn, dataset_groups[dataset][start:start + chunk_size])
+             for start in range(0, longest, chunk_size)
+             for dataset in range(len(datasets))
+             if start < len(dataset_groups[dataset])]
+
+    shared = []
+    try:
+        for arrays in datasets:
+            shared.append(share_trade_arrays(arrays))
+        blocks = [(shm.name, layout) for shm, layout in shared]
+        with mp.Pool(workers, initializer=_init_worker, initargs=(blocks,)) as pool:
+            yield from pool.imap_unordered(_run_task, tasks)
+    finally:
+        for shm, _ in shared:
+            shm.close()
+            shm.unlink()
+
+def map_group_chunks(trade_arrays, groups, chunk_fn, workers=1, chunk_size=None):
+    """Yield chunk_fn(arrays, groups_chunk, cache) over chunks of one dataset's selection groups"""
+    for _, result in map_dataset_chunks([trade_arrays], groups, chunk_fn, workers, chunk_size):
+        yield result
+
+def run_sweep(trade_arrays, configs, workers=1, chunk_size=None, start_states=None, exact=False,
+              prune=True, stats=None):
+    """
+    Simulate every config and yield (config_index, result) as results arrive
+
+    Each distinct trade selection is evaluated once and every portfolio_pct
+    is replayed on it. start_states (one STATE_KEYS tuple per config) resumes
+    each config from a checkpoint instead of a fresh $100 balance. With
+    workers > 1 the results stream back out of order; callers that need the
+    original ordering should key on config_index. exact=True replays every
+    balance trade by trade, bit-identical to simulate_with_config.
+
+    With prune, selections that execute the same trades on this data are
+    simulated once per chunk (see _run_groups); pass a dict as stats to
+    receive the prune counts once the sweep is done.
+    """
+    groups = group_by_selection(configs, start_states)
+
+    if workers <= 1:
+        chunk_stats = {'digests': [], 'simulations': 0} if prune else None
+        yield from _run_groups(trade_arrays, groups, SelectionCache(), exact, chunk_stats)
+        if prune and stats is not None:
+            stats.update(_prune_stats(groups, [chunk_stats]))
+        return
+
+    all_stats = []
+    chunk_fn = partial(_sweep_chunk, exact, prune)
+    for chunk_results, chunk_stats in map_group_chunks(trade_arrays, groups, chunk_fn, workers, chunk_size):
+        if prune:
+            all_stats.append(chunk_stats)
+        yield from chunk_results
+    if prune and stats is not None:
+        stats.update(_prune_stats(groups, all_stats))
+
+def run_sweeps(datasets, configs, workers=1, chunk_size=None, exact=False, prune=True, stats=None):
+    """
+    Simulate every config on every dataset, yielding (dataset_index, config_index, result)
+
+    The config list is grouped once and shared by all datasets; with
+    workers > 1 the sweeps run concurrently on one pool. prune merges
+    equivalent selections per dataset, as in run_sweep; stats, if given,
+    is filled with a list of per-dataset counts.
+    """
+    groups = group_by_selection(configs)
+    dataset_stats = [[] for _ in datasets]
+    chunk_fn = partial(_sweep_chunk, exact, prune)
+    for dataset, (chunk_results, chunk_stats) in map_dataset_chunks(datasets, groups, chunk_fn, workers,
+                                                                     chunk_size):
+        if prune:
+            dataset_stats[dataset].append(chunk_stats)
+        for i, result in chunk_results:
+            yield dataset, i, result
+    if prune and stats is not None:
+        stats['datasets'] = [_prune_stats(groups, chunk_stats) for chunk_stats in dataset_stats]
@@ -0,0 +1,108 @@
+"""
+Checkpointed incremental sweeps for the BTC Scalper optimizers
+Saves every config's end state after a sweep so the next run only replays the
+windows appended since then
+"""
+
+import hashlib
+import json
+import os
+
+import numpy as np
+
+from backtest_engine import STATE_KEYS
+
+CHECKPOINT_VERSION = 2
+
+STATE_DTYPES = {
+    'final_balance': np.float64,
+    'max_drawdown': np.float64,
+    'total_trades': np.int64,
+    'winning_trades': np.int64,
+    'gross_wins': np.float64,
+    'gross_losses': np.float64,
+}
+
+def configs_digest(configs):
+    """SHA-256 of the config list, in order"""
+    return hashlib.sha256(json.dumps(configs, sort_keys=True).encode()).hexdigest()
+
+def windows_digest(arrays, n_windows):
+    """
+    SHA-256 of every trade in the first n_windows windows
+
+    Codes are hashed as labels so the digest does not depend on whether the
+    arrays came from JSON or from a trade store.
+    """
+    end = int(arrays['window_offsets'][n_windows])
+    digest = hashlib.sha256()
+    digest.update('\n'.join(arrays['window_starts'][:n_windows]).encode())
+    digest.update(np.ascontiguousarray(arrays['window_offsets'][:n_windows + 1], dtype=np.int64).tobytes())
+    digest.update(np.ascontiguousarray(arrays['entry_minute'][:end], dtype=np.int64).tobytes())
+    digest.update(np.ascontiguousarray(arrays['buy_price_cents'][:end], dtype=np.float64).tobytes())
+    digest.update(np.ascontiguousarray(arrays['is_win'][:end]).tobytes())
+
+    labels = np.array(arrays['direction_labels'] or [''], dtype=str)
+    digest.update('\n'.join(labels[arrays['direction'][:end]].tolist()).encode())
+    return digest.hexdigest()
+
+def load_checkpoint(path, arrays, configs, exact=False):
+    """
+    (first_window, start_states) to resume a sweep from, or None
+
+    The checkpoint only applies when the config list is unchanged, the
+    windows it covered are byte-for-byte the same in the current data and it
+    was written in the same compounding mode (exact or log-space). An exact
+    resume then gives exactly the results of a full replay; a log-space one
+    agrees with it to float rounding, like any log-space sweep.
+    """
+    if not os.path.exists(path):
+        return None
+
+    with np.load(path) as checkpoint:
+        meta = json.loads(str(checkpoint['meta']))
+        columns = {key: checkpoint[key] for key in STATE_KEYS}
+
+    n_windows = meta['windows']
+    if meta['version'] != CHECKPOINT_VERSION:
+        print(f"Checkpoint {path} has an old format, running a full sweep")
+        return None
+    if meta['configs'] != configs_digest(configs):
+        print(f"Checkpoint {path} was made for a different config grid, running a full sweep")
+        return None
+    if meta['exact'] != bool(exact):
+        made = 'without --fast' if meta['exact'] else 'with --fast'
+        print(f"Checkpoint {path} was made {made}, running a full sweep")
+        return None
+    if (n_windows > len(arrays['window_starts']) or
+            meta['windows_sha256'] != windows_digest(arrays, n_windows)):
+        print(f"Checkpointed windows in {path} no longer match the trade data, running a full sweep")
+        return None
+
+    start_states = list(zip(*(columns[key].tolist() for key in STATE_KEYS)))
+    return n_windows, start_states
+
+class StateRecorder:
+    """End state of every config in a sweep, saved as the next run's checkpoint"""
+
+    def __init__(self, n_configs):
+        self.columns = {key: np.zeros(n_configs, dtype=STATE_DTYPES[key]) for key in STATE_KEYS}
+
+    def record(self, index, result):
+        for key in STATE_KEYS:
+            self.columns[key][index] = result[key]
+
+    def save(self, path, arrays, configs, exact=False):
+        n_windows = len(arrays['window_starts'])
+        meta = {
+            'version': CHECKPOINT_VERSION,
+            'configs': configs_digest(configs),
+            'exact': bool(exact),
+            'windows': n_windows,
+            'last_window': arrays['window_starts'][-1] if n_windows else None,
+            'windows_sha256': windows_digest(arrays, n_windows),
+        }
+        # Write then rename so an interrupted save never leaves a torn checkpoint
+        tmp_path = path + '.tmp.npz'
+        np.savez(tmp_path, meta=np.array(json.dumps(meta)), **self.columns)
+        os.replace(tmp_path, path)
@@ -0,0 +1,156 @@
+"""
+Streaming result collection for the config sweep
+Keeps a bounded top-K plus the per-group statistics behind the DETAILED ANALYSIS report,
+so memory stays constant whatever the size of the grid
+"""
+
+import heapq
+
+def flip_mode(config):
+    """Direction-flip handling of a config: 'allow', 'stop' or 'first'"""
+    if config['first_direction_only']:
+        return 'first'
+    if config['stop_on_flip']:
+        return 'stop'
+    return 'allow'
+
+# Group name -> key function over a config
+GROUP_KEYS = {
+    'flip_mode': flip_mode,
+    'max_buy_price': lambda c: c['max_buy_price'],
+    'portfolio_pct': lambda c: c['portfolio_pct'],
+    'minute_range': lambda c: (c['min_minute'], c['max_minute']),
+}
+
+def result_record(result):
+    """JSON-ready summary of a ranked result, as written to optimization_results.json"""
+    return {
+        'config': result['config'],
+        'config_str': result['config_str'],
+        'final_balance': result['final_balance'],
+        'total_trades': result['total_trades'],
+        'win_rate': result['win_rate'],
+        'max_drawdown': result['max_drawdown'],
+        'profit_factor': result['profit_factor'] if result['profit_factor'] != float('inf') else None,
+        'gross_wins': result['gross_wins'],
+        'gross_losses': result['gross_losses']
+    }
+
+class ResultAggregator:
+    """
+    Collects sweep results one at a time
+
+    Only the top_k results by final_balance are retained (ties keep the
+    lower config index, matching a stable sort of the full list). Every
+    result also feeds running count / sum / max per group. With traded_only
+    the group statistics skip configs that never traded.
+    """
+
+    def __init__(self, top_k=100, traded_only=False):
+        self.top_k = top_k
+        self.traded_only = traded_only
+        self.count = 0
+        self._heap = []
+        self.groups = {name: {} for name in GROUP_KEYS}
+
+    def _offer(self, entry):
+        if len(self._heap) < self.top_k:
+            heapq.heappush(self._heap, entry)
+        elif entry[:2] > self._heap[0][:2]:
+            heapq.heapreplace(self._heap, entry)
+
+    def add(self, index, config, result):
+        """Record one simulate result for configs[index]"""
+        self.count += 1
+        self._offer((result['final_balance'], -index, index, config, result))
+
+        if self.traded_only and result['total_trades'] == 0:
+            return
+
+        for name, key_fn in GROUP_KEYS.items():
+            stats = self.groups[name].get(key_fn(config))
+            if stats is None:
+                stats = self.groups[name][key_fn(config)] = {
+                    'count': 0,
+                    'balance_sum': 0.0,
+                    'balance_max': result['final_balance'],
+                    'trades_sum': 0,
+                }
+            stats['count'] += 1
+            stats['balance_sum'] += result['final_balance']
+            stats['trades_sum'] += result['total_trades']
+            if result['final_balance'] > stats['balance_max']:
+                stats['balance_max'] = result['final_balance']
+
+    def merge(self, other):
+        """
+        Fold in another aggregator's results, e.g. one per sweep shard
+
+        The merged top-K is exactly the one a single aggregator fed every
+        result would hold, as long as config indices refer to the same
+        config list. Group sums are added, so averages can differ from a
+        single pass in the last float digits.
+        """
+        self.count += other.count
+        for entry in other._heap:
+            self._offer(entry)
+        for name, groups in other.groups.items():
+            for key, theirs in groups.items():
+                stats = self.groups[name].get(key)
+                if stats is None:
+                    self.groups[name][key] = dict(theirs)
+                    continue
+                stats['count'] += theirs['count']
+                stats['balance_sum'] += theirs['balance_sum']
+                stats['trades_sum'] += theirs['trades_sum']
+                stats['balance_max'] = max(stats['balance_max'], theirs['balance_max'])
+        return self
+
+    def state(self):
+        """JSON-ready snapshot of the top-K and group statistics (see from_state)"""
+        return {
+            'top_k': self.top_k,
+            'traded_only': self.traded_only,
+            'count': self.count,
+            'top': [{'index': index, 'config': config, 'result': result}
+                    for _, _, index, config, result in self._heap],
+            'groups': {name: [[key, stats] for key, stats in groups.items()]
+                       for name, groups in self.groups.items()},
+        }
+
+    @classmethod
+    def from_state(cls, state):
+        """Aggregator rebuilt from a state() snapshot that went through JSON"""
+        aggregator = cls(state['top_k'], state['traded_only'])
+        aggregator.count = state['count']
+        for entry in state['top']:
+            index, result = entry['index'], entry['result']
+            aggregator._offer((result['final_balance'], -index, index, entry['config'], result))
+        for name, items in state['groups'].items():
+            # JSON turns the minute_range tuples into lists
+            aggregator.groups[name] = {tuple(key) if isinstance(key, list) else key: stats
+                                       for key, stats in items}
+        return aggregator
+
+    def top(self):
+        """Retained results, best first, each with its 'config' and 'config_index' attached"""
+        ranked = sorted(self._heap, key=lambda e: (-e[0], e[2]))
+        top_results = []
+        for _, _, index, config, result in ranked:
+            result = dict(result)
+            result['config'] = config
+            result['config_index'] = index
+            top_results.append(result)
+        return top_results
+
+    def summary(self, name):
+        """Per-group avg / max final_balance, avg trades and config count"""
+        return {
+            key: {
+                'count': stats['count'],
+                'avg': stats['balance_sum'] / stats['count'],
+                'max': stats['balance_max'],
+                'avg_trades': stats['trades_sum'] / stats['count'],
+            }
+            for key, stats in self.groups[name].items()
+        }
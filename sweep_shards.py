@@ -0,0 +1,109 @@
+"""
+Sharded config sweeps for the BTC Scalper optimizer
+Splits the config grid into N deterministic shards that separate processes or
+hosts can sweep independently, and merges their partial top-K and group
+statistics back into a single-run result
+
+Usage:
+    python analyze_optimal_config.py --shard 1/4          # on each host / process, 1/4 .. 4/4
+    python analyze_optimal_config.py --merge data/shards/shard_*_of_4.json
+"""
+
+import json
+import os
+
+from results_cache import dataset_fingerprint
+from sweep import group_by_selection
+from sweep_checkpoint import configs_digest
+from sweep_results import ResultAggregator
+
+SHARD_VERSION = 1
+
+def parse_shard(spec):
+    """'i/N' (1-based) -> (i, N)"""
+    try:
+        index, count = (int(part) for part in spec.split('/'))
+    except ValueError:
+        raise ValueError(f"Shard must look like i/N, got {spec!r}")
+    if count < 1 or not 1 <= index <= count:
+        raise ValueError(f"Shard {spec} is out of range (i must be between 1 and N)")
+    return index, count
+
+def shard_path(index, count, shard_dir='data/shards'):
+    return os.path.join(shard_dir, f'shard_{index}_of_{count}.json')
+
+def shard_indices(configs, index, count):
+    """
+    Config indices belonging to shard index of count
+
+    Shards are contiguous runs of selection groups, so every portfolio_pct
+    of a selection lands in the same shard (one selection, one
+    simulation) and neighbouring static filters stay together for the
+    SelectionCache. The split depends only on the config list.
+    """
+    groups = group_by_selection(configs)
+    start = (index - 1) * len(groups) // count
+    end = index * len(groups) // count
+    return sorted(i for _, sizings in groups[start:end] for i, _, _ in sizings)
+
+def save_shard(path, aggregator, index, count, trade_arrays, configs, exact):
+    """Write a shard's aggregator state with what the merge needs to validate it"""
+    os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+    shard = {
+        'version': SHARD_VERSION,
+        'shard': [index, count],
+        'configs': configs_digest(configs),
+        'dataset': dataset_fingerprint(trade_arrays),
+        'exact': exact,
+        'aggregator': aggregator.state(),
+    }
+    # Write then rename so a merge never picks up a half-written shard
+    tmp_path = path + '.tmp'
+    with open(tmp_path, 'w') as f:
+        json.dump(shard, f)
+    os.replace(tmp_path, path)
+
+def merge_shards(paths, trade_arrays, configs):
+    """
+    One ResultAggregator holding every shard's results
+
+    Raises ValueError unless the shards were all made from this config
+    list and trade data, in the same compounding mode, and together cover
+    each of the N shards exactly once.
+    """
+    digest = configs_digest(configs)
+    fingerprint = dataset_fingerprint(trade_arrays)
+
+    merged = None
+    seen = set()
+    counts = set()
+    modes = set()
+    for path in paths:
+        with open(path, 'r') as f:
+            shard = json.load(f)
+        if shard.get('version') != SHARD_VERSION:
+            raise ValueError(f"{path} has an unsupported shard format")
+        if shard['configs'] != digest:
+            raise ValueError(f"{path} was swept over a different config grid")
+        if shard['dataset'] != fingerprint:
+            raise ValueError(f"{path} was swept over different trade data")
+
+        index, count = shard['shard']
+        if (index, count) in seen:
+            raise ValueError(f"Shard {index}/{count} given twice")
+        seen.add((index, count))
+        counts.add(count)
+        modes.add(shard['exact'])
+
+        aggregator = ResultAggregator.from_state(shard['aggregator'])
+        merged = aggregator if merged is None else merged.merge(aggregator)
+
+    if len(counts) != 1 or len(modes) != 1:
+        raise ValueError("Shards come from different --shard splits or --fast settings")
+    count = counts.pop()
+    missing = sorted(set(range(1, count + 1)) - {index for index, _ in seen})
+    if missing:
+        raise ValueError(f"Missing shard(s) {', '.join(f'{i}/{count}' for i in missing)}")
+    if merged.count != len(configs):
+        raise ValueError(f"Shards hold {merged.count} results for {len(configs)} configs")
+    return merged
@@ -0,0 +1,83 @@
+"""
+Seeded synthetic trade generator for the BTC Scalper analyzers
+Produces trades in the data/trades.json format with control over window count,
+trades per window, direction flip frequency and buy price distribution
+
+Usage:
+    python synthetic_trades.py OUTPUT.json [--windows N] [--trades-per-window K] [--seed S]
+"""
+
+import argparse
+import json
+import random
+from datetime import datetime, timedelta, timezone
+
+WINDOW_MINUTES = 15
+START = datetime(2026, 1, 1, tzinfo=timezone.utc)
+
+def _iso(moment):
+    return moment.strftime('%Y-%m-%dT%H:%M:%SZ')
+
+def generate_trades(windows=1000, trades_per_window=3, flip_prob=0.1,
+                    price_mean=58.0, price_std=10.0, price_min=30, price_max=95,
+                    win_rate=0.55, seed=0):
+    """
+    Build a list of trade dicts
+
+    - trades_per_window: mean trades per window (each window gets 1..2k-1, uniform)
+    - flip_prob: chance each trade reverses the window's current direction
+    - price_mean / price_std: normal buy price in cents, clipped to [price_min, price_max]
+    - win_rate: probability a trade resolves as WIN
+    """
+    rng = random.Random(seed)
+    trades = []
+
+    for w in range(windows):
+        window_start = START + timedelta(minutes=WINDOW_MINUTES * w)
+        direction = rng.choice(('UP', 'DOWN'))
+        count = rng.randint(1, max(1, 2 * trades_per_window - 1))
+        minutes = sorted(rng.randint(1, WINDOW_MINUTES - 2) for _ in range(count))
+
+        for entry_minute in minutes:
+            if rng.random() < flip_prob:
+                direction = 'DOWN' if direction == 'UP' else 'UP'
+
+            price = int(round(rng.gauss(price_mean, price_std)))
+            price = min(price_max, max(price_min, price))
+            result = 'WIN' if rng.random() < win_rate else 'LOSS'
+            # Flat $1 stake, like the bot's recorded profit
+            profit = (100.0 / price - 1.0) if result == 'WIN' else -1.0
+
+            timestamp = window_start + timedelta(minutes=entry_minute - 1, seconds=rng.randint(0, 59))
+            trades.append({
+                'timestamp': _iso(timestamp),
+                'window_start': _iso(window_start),
+                'entry_minute': entry_minute,
+                'direction': direction,
+                'buy_price_cents': price,
+                'result': result,
+                'profit': profit,
+            })
+
+    return trades
+
+def main():
+    parser = argparse.ArgumentParser(description='Write a synthetic trades.json export')
+    parser.add_argument('output')
+    parser.add_argument('--windows', type=int, default=1000)
+    parser.add_argument('--trades-per-window', type=int, default=3)
+    parser.add_argument('--flip-prob', type=float, default=0.1)
+    parser.add_argument('--price-mean', type=float, default=58.0)
+    parser.add_argument('--price-std', type=float, default=10.0)
+    parser.add_argument('--win-rate', type=float, default=0.55)
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+
+    trades = generate_trades(args.windows, args.trades_per_window, args.flip_prob,
+                             args.price_mean, args.price_std, win_rate=args.win_rate, seed=args.seed)
+    with open(args.output, 'w') as f:
+        json.dump({'trades': trades}, f)
+    print(f"Wrote {len(trades)} trades across {args.windows} windows to {args.output}")
+
+if __name__ == '__main__':
+    main()
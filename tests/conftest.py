@@ -0,0 +1,5 @@
+import os
+import sys
+
+# The analyzers are top-level scripts, not a package
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
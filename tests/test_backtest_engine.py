@@ -0,0 +1,92 @@
+"""Sweep engine results against the reference simulate_with_config"""
+
+import pytest
+
+from analyze_optimal_config import generate_all_configs, group_trades_by_window, simulate_with_config
+from backtest_engine import build_trade_arrays
+from sweep import run_sweep
+from synthetic_trades import generate_trades
+from trade_model import trades_from_dicts
+
+METRICS = ('final_balance', 'total_trades', 'win_rate', 'max_drawdown', 'profit_factor',
+           'gross_wins', 'gross_losses')
+
+BASE_CONFIG = {
+    'min_minute': 1,
+    'max_minute': 13,
+    'portfolio_pct': 0.01,
+    'max_buy_price': None,
+    'stop_on_flip': False,
+    'stop_after_n_losses': None,
+    'max_trades_per_window': None,
+    'first_direction_only': False,
+}
+
+def edge_configs():
+    """Configs whose selection executes no trades at all"""
+    return [
+        dict(BASE_CONFIG, max_buy_price=1),
+        dict(BASE_CONFIG, min_minute=14, max_minute=14, portfolio_pct=0.02),
+    ]
+
+def small_grid():
+    configs = generate_all_configs()
+    return configs[::797] + edge_configs()
+
+def trades_by_window(win_rate, seed):
+    trades = generate_trades(windows=80, trades_per_window=4, flip_prob=0.3, win_rate=win_rate, seed=seed)
+    return group_trades_by_window(trades_from_dicts(trades))
+
+@pytest.fixture(scope='module', params=[0.55, 0.0], ids=['mixed', 'all-loss'])
+def windows(request):
+    return trades_by_window(request.param, seed=11)
+
+def detect_direction_flip(window_trades):
+    """Reference for window_first_flip: (flipped, index of the first trade off the previous direction)"""
+    directions = [t.direction for t in window_trades]
+    for i in range(1, len(directions)):
+        if directions[i] != directions[i-1]:
+            return True, i
+    return False, None
+
+def sweep_results(windows, configs, **kwargs):
+    results = [None] * len(configs)
+    for i, result in run_sweep(build_trade_arrays(windows), configs, **kwargs):
+        results[i] = result
+    return results
+
+def test_exact_sweep_is_bit_identical(windows):
+    configs = small_grid()
+    for config, result in zip(configs, sweep_results(windows, configs, exact=True)):
+        expected = simulate_with_config(windows, config)
+        assert {key: result[key] for key in METRICS} == {key: expected[key] for key in METRICS}
+
+def test_log_sweep_matches_reference(windows):
+    configs = small_grid()
+    for config, result in zip(configs, sweep_results(windows, configs)):
+        expected = simulate_with_config(windows, config)
+        for key in METRICS:
+            assert result[key] == pytest.approx(expected[key], rel=1e-9), key
+
+@pytest.mark.parametrize('exact', [False, True])
+def test_zero_trade_selection(windows, exact):
+    results = sweep_results(windows, edge_configs(), exact=exact, prune=False)
+    for result in results:
+        assert result['total_trades'] == 0
+        assert result['final_balance'] == 100.0
+        assert result['max_drawdown'] == 100.0
+        assert result['profit_factor'] == float('inf')
+
+def test_window_feature_table(windows):
+    arrays = build_trade_arrays(windows)
+    for w, window_start in enumerate(arrays['window_starts']):
+        trades = windows[window_start]
+        flipped, flip_at = detect_direction_flip(trades)
+        assert arrays['window_first_flip'][w] == (flip_at if flipped else -1)
+        assert arrays['window_first_direction'][w] == trades[0].direction
+        assert arrays['window_max_price'][w] == max(t.buy_price_cents for t in trades)
+        assert arrays['window_profit'][w] == pytest.approx(sum(t.profit for t in trades))
+
+        start = arrays['window_offsets'][w]
+        losses = [sum(not t.is_win for t in trades[:k]) for k in range(len(trades))]
+        assert arrays['losses_before'][start:start + len(trades)].tolist() == losses
@@ -0,0 +1,22 @@
+"""Successive halving plans"""
+
+import pytest
+
+from config_search import halving_plan
+
+def test_plan_stays_within_budget():
+    plan = halving_plan(10000, 500, eta=3, n_windows=3000)
+    assert plan[-1][1] == 1.0
+    assert sum(n * fraction for n, fraction in plan) <= 500
+    assert [n for n, _ in plan] == sorted((n for n, _ in plan), reverse=True)
+
+def test_budget_covering_the_grid_is_one_rung():
+    assert halving_plan(100, 100) == [(100, 1.0)]
+
+def test_smallest_budget_scores_one_config():
+    assert halving_plan(100, 1) == [(1, 1.0)]
+
+@pytest.mark.parametrize('budget, eta', [(0.5, 3), (0, 3), (-10, 3), (100, 1), (100, 0)])
+def test_rejects_bad_budget_or_eta(budget, eta):
+    with pytest.raises(ValueError):
+        halving_plan(1000, budget, eta)
@@ -0,0 +1,39 @@
+"""Monte Carlo resampling and the results / trades match check"""
+
+import numpy as np
+
+from analyze_optimal_config import generate_all_configs, group_trades_by_window
+from backtest_engine import build_trade_arrays, select_trades, simulate_vectorized, window_log_growth
+from monte_carlo import mismatched_results, simulate_paths
+from synthetic_trades import generate_trades
+from trade_model import trades_from_dicts
+
+def _arrays(seed):
+    return build_trade_arrays(group_trades_by_window(trades_from_dicts(generate_trades(60, seed=seed))))
+
+def _records(arrays, configs):
+    return [{'config': config, 'total_trades': simulate_vectorized(arrays, config)['total_trades']}
+            for config in configs]
+
+def test_fixed_seed_paths_are_reproducible_and_permute_keeps_final():
+    arrays = _arrays(3)
+    configs = generate_all_configs()[::400][:5]
+    outcomes = [window_log_growth(arrays, select_trades(arrays, c), c['portfolio_pct']) for c in configs]
+    log_growth = np.array([g for g, _ in outcomes])
+    log_low = np.array([low for _, low in outcomes])
+
+    first = simulate_paths(log_growth, log_low, 200, seed=11)
+    again = simulate_paths(log_growth, log_low, 200, seed=11)
+    assert all(np.array_equal(a, b) for a, b in zip(first, again))
+    assert not np.array_equal(first[0], simulate_paths(log_growth, log_low, 200, seed=12)[0])
+
+    finals, _ = simulate_paths(log_growth, log_low, 50, seed=11, mode='permute')
+    historical = [simulate_vectorized(arrays, c)['final_balance'] for c in configs]
+    assert np.allclose(finals, np.array(historical)[:, None])
+
+def test_results_from_other_trades_are_rejected():
+    configs = generate_all_configs()[::400][:20]
+    swept, other = _arrays(3), _arrays(4)
+    ranked = _records(swept, configs)
+    assert mismatched_results(ranked, [select_trades(swept, c) for c in configs]) == []
+    assert mismatched_results(ranked, [select_trades(other, c) for c in configs])
@@ -0,0 +1,18 @@
+"""Ranking helpers of the multi-dataset optimizer"""
+
+import numpy as np
+
+from optimize import average_ranks, rank_balances
+
+def test_rank_balances_breaks_ties_by_config_index():
+    assert rank_balances(np.array([5.0, 9.0, 5.0, 1.0])).tolist() == [2, 1, 3, 4]
+
+def test_average_ranks_share_ties():
+    assert average_ranks(np.array([3.0, 1.0, 3.0, 2.0, 3.0, 1.0])).tolist() == [5, 1.5, 5, 3, 5, 1.5]
+
+def test_tied_balances_do_not_bias_the_correlation():
+    # Every config ties on one dataset: ranks by index would correlate perfectly with the other
+    flat, rising = np.full(6, 100.0), np.array([6.0, 5.0, 4.0, 3.0, 2.0, 1.0])
+    assert np.corrcoef(rank_balances(flat), rank_balances(rising))[0, 1] == 1.0
+    half = np.array([1.0, 1.0, 1.0, 2.0, 2.0, 2.0])
+    assert np.corrcoef(average_ranks(-half), average_ranks(-rising))[0, 1] < 0
@@ -0,0 +1,32 @@
+"""Option checks of the shared optimizer command line"""
+
+import sys
+
+import pytest
+
+from optimizer_cli import parse_args
+
+def _parse(monkeypatch, *argv, suffix=''):
+    monkeypatch.setattr(sys, 'argv', ['optimizer', *argv])
+    return parse_args('test optimizer', suffix)
+
+def test_shard_default_outputs_carry_the_shard(monkeypatch):
+    args = _parse(monkeypatch, '--shard', '2/4', '--tensor', '--all-results', suffix='_full')
+    assert args.tensor == 'data/result_tensor_full_shard_2_of_4'
+    assert args.all_results == 'data/optimization_results_full_shard_2_of_4.ndjson'
+
+    args = _parse(monkeypatch, '--shard', '2/4', '--tensor', 'mine', '--all-results', 'mine.ndjson')
+    assert (args.tensor, args.all_results) == ('mine', 'mine.ndjson')
+    args = _parse(monkeypatch, '--tensor', '--all-results')
+    assert (args.tensor, args.all_results) == ('data/result_tensor', 'data/optimization_results.ndjson')
+
+@pytest.mark.parametrize('argv', [
+    ['--days', '3'],
+    ['--shard', '1/2', '--checkpoint', 'c.npz'],
+    ['--shard', '1/2', '--pareto'],
+    ['--merge', 'a.json', '--tensor'],
+])
+def test_rejected_combinations(monkeypatch, capsys, argv):
+    with pytest.raises(SystemExit):
+        _parse(monkeypatch, *argv)
+    assert 'error' in capsys.readouterr().err
@@ -0,0 +1,53 @@
+"""Result tensor: fill, save / memory-map, and reductions against plain loops"""
+
+import numpy as np
+
+from analyze_optimal_config import generate_all_configs
+from result_tensor import AXES, METRICS, ResultTensor, open_result_tensor
+
+def _filled():
+    configs = generate_all_configs()[::37]
+    rng = np.random.default_rng(1)
+    results = [{name: float(value) for name, value in zip(METRICS, rng.random(len(METRICS)) * 100)}
+               for _ in configs]
+    tensor = ResultTensor.for_configs(configs)
+    for i, result in enumerate(results):
+        tensor.add(i, result)
+    return configs, results, tensor
+
+def test_save_and_open_round_trip(tmp_path):
+    configs, results, tensor = _filled()
+    tensor.save(str(tmp_path / 'tensor'))
+    opened = open_result_tensor(str(tmp_path / 'tensor'))
+
+    assert opened.shape == tensor.shape
+    assert opened.axes == tensor.axes
+    for name in METRICS + ('config_index',):
+        np.testing.assert_array_equal(opened.arrays[name], tensor.arrays[name], err_msg=name)
+    index = np.asarray(opened.arrays['config_index'])
+    assert sorted(index[index >= 0].tolist()) == list(range(len(configs)))
+    balances = [r['final_balance'] for r in results]
+    assert opened.best() == int(np.argmax(balances))
+
+def test_reduce_matches_loops_and_keeps_requested_axis_order():
+    configs, results, tensor = _filled()
+    rows, cols = 'portfolio_pct', 'min_minute'
+    assert AXES.index(rows) > AXES.index(cols)
+
+    table = tensor.reduce('win_rate', (rows, cols), 'max')
+    assert table.shape == (len(tensor.axes[rows]), len(tensor.axes[cols]))
+    np.testing.assert_array_equal(table, tensor.reduce('win_rate', (cols, rows), 'max').T)
+    three = tensor.reduce('win_rate', ('stop_on_flip', rows, cols), 'max')
+    np.testing.assert_array_equal(np.nanmax(three, axis=0), table)
+    np.testing.assert_array_equal(three, np.transpose(tensor.reduce('win_rate', (cols, 'stop_on_flip', rows), 'max'),
+                                                      (1, 2, 0)))
+    for r, row_value in enumerate(tensor.axes[rows]):
+        for c, col_value in enumerate(tensor.axes[cols]):
+            values = [res['win_rate'] for config, res in zip(configs, results)
+                      if config[rows] == row_value and config[cols] == col_value]
+            assert (max(values) if values else None) == (None if np.isnan(table[r, c]) else table[r, c])
+
+    for value, mean in tensor.marginal('final_balance', 'max_buy_price').items():
+        values = [res['final_balance'] for config, res in zip(configs, results) if config['max_buy_price'] == value]
+        assert np.isclose(mean, np.mean(values))
+    assert tensor.reduce('total_trades', how='count') == len(configs)
@@ -0,0 +1,63 @@
+"""Results cache: hits, misses and what a result is keyed on"""
+
+from analyze_optimal_config import generate_all_configs, group_trades_by_window
+from backtest_engine import build_trade_arrays
+from results_cache import ResultsCache, cached_sweep
+from sweep import run_sweep
+from synthetic_trades import generate_trades
+from trade_model import trades_from_dicts
+
+def _arrays(seed):
+    return build_trade_arrays(group_trades_by_window(trades_from_dicts(generate_trades(40, seed=seed))))
+
+def _cached(path, arrays, configs, exact=True):
+    stats = {}
+    with ResultsCache(path) as cache:
+        results = dict(cached_sweep(cache, arrays, configs, exact=exact, stats=stats))
+    return results, stats
+
+def test_hits_match_a_fresh_sweep_and_only_new_configs_run(tmp_path):
+    path = str(tmp_path / 'cache.db')
+    arrays = _arrays(6)
+    configs = generate_all_configs()[::200]
+    expected = dict(run_sweep(arrays, configs, exact=True))
+
+    first, stats = _cached(path, arrays, configs)
+    assert (stats['cache_hits'], stats['cache_misses']) == (0, len(configs))
+    assert first == expected
+
+    again, stats = _cached(path, arrays, configs)
+    assert (stats['cache_hits'], stats['cache_misses']) == (len(configs), 0)
+    assert again == expected
+
+    extended = configs + generate_all_configs()[100::200]
+    results, stats = _cached(path, arrays, extended)
+    assert (stats['cache_hits'], stats['cache_misses']) == (len(configs), len(extended) - len(configs))
+    assert results == dict(run_sweep(arrays, extended, exact=True))
+
+def test_results_are_keyed_by_mode_and_data(tmp_path):
+    path = str(tmp_path / 'cache.db')
+    arrays = _arrays(6)
+    configs = generate_all_configs()[::400]
+    _cached(path, arrays, configs, exact=True)
+
+    log_results, stats = _cached(path, arrays, configs, exact=False)
+    assert stats['cache_hits'] == 0
+    assert log_results == dict(run_sweep(arrays, configs, exact=False))
+
+    _, stats = _cached(path, _arrays(7), configs)
+    assert stats['cache_hits'] == 0
+    with ResultsCache(path) as cache:
+        assert len(cache) == 3 * len(configs)
+
+def test_evict_drops_least_recently_used_datasets(tmp_path):
+    path = str(tmp_path / 'cache.db')
+    configs = generate_all_configs()[::400]
+    for seed in (6, 7, 8):
+        _cached(path, _arrays(seed), configs)
+    _cached(path, _arrays(6), configs)  # 6 is now the most recently used
+
+    with ResultsCache(path, max_entries=len(configs)) as cache:
+        assert cache.evict() == 2 * len(configs)
+    _, stats = _cached(path, _arrays(6), configs)
+    assert stats['cache_hits'] == len(configs)
@@ -0,0 +1,58 @@
+"""NDJSON results file: write then read back"""
+
+import random
+
+import numpy as np
+
+from analyze_optimal_config import config_to_string, generate_all_configs, group_trades_by_window
+from backtest_engine import build_trade_arrays
+from results_file import CONFIG_FIELDS, METRIC_FIELDS, ResultsFile, ResultsWriter
+from sweep import run_sweep
+from synthetic_trades import generate_trades
+from trade_model import trades_from_dicts
+
+def _sweep():
+    arrays = build_trade_arrays(group_trades_by_window(trades_from_dicts(generate_trades(40, seed=2))))
+    configs = generate_all_configs()[::150]
+    results = list(run_sweep(arrays, configs, exact=True))
+    random.Random(0).shuffle(results)  # as a parallel sweep delivers them
+    return configs, results
+
+def test_round_trip(tmp_path):
+    configs, results = _sweep()
+    path = str(tmp_path / 'results.ndjson')
+    with ResultsWriter(path, config_to_string, total_configs=len(configs)) as writer:
+        for index, result in results:
+            writer.add(index, configs[index], result)
+    assert writer.count == len(results)
+
+    with ResultsFile(path) as read:
+        assert read.header['total_configs'] == len(configs)
+        assert len(read) == len(results)
+        for index, result in results:
+            record = read.get(config_to_string(configs[index]))
+            assert record['config_index'] == index
+            assert record['config'] == {field: configs[index][field] for field in CONFIG_FIELDS}
+            for field in METRIC_FIELDS:
+                expected = None if result[field] == float('inf') else result[field]
+                assert record[field] == expected, field
+        assert read.get('not a config') is None
+        assert [r['config_index'] for r in read] == [index for index, _ in results]
+
+        balances = {index: result['final_balance'] for index, result in results}
+        expected_top = sorted(balances, key=lambda i: (-balances[i], i))[:5]
+        assert [r['config_index'] for r in read.top(5)] == expected_top
+
+def test_partial_last_line_is_skipped(tmp_path):
+    configs, results = _sweep()
+    path = str(tmp_path / 'results.ndjson')
+    with ResultsWriter(path, config_to_string) as writer:
+        for index, result in results[:3]:
+            # numpy scalars, as the engine returns them
+            writer.add(index, configs[index], dict(result, final_balance=np.float64(result['final_balance'])))
+    with open(path, 'a') as f:
+        f.write('["M1-2 | cut off", 9')
+
+    with ResultsFile(path) as read:
+        assert len(read) == 3
+        assert read.get(config_to_string(configs[results[0][0]]))['final_balance'] == results[0][1]['final_balance']
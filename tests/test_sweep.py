@@ -0,0 +1,68 @@
+"""Parallel sweeps over shared-memory trade arrays"""
+
+import os
+import subprocess
+import sys
+import textwrap
+
+import pytest
+
+import sweep
+from analyze_optimal_config import generate_all_configs, group_trades_by_window
+from backtest_engine import build_trade_arrays
+from sweep import run_sweep, run_sweeps
+from synthetic_trades import generate_trades
+from trade_model import trades_from_dicts
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+def test_parallel_sweep_matches_serial_and_cleans_up():
+    # Run in a fresh interpreter so the resource tracker's stderr at exit is captured
+    script = textwrap.dedent("""
+        from analyze_optimal_config import generate_all_configs, group_trades_by_window
+        from backtest_engine import build_trade_arrays
+        from sweep import run_sweep
+        from synthetic_trades import generate_trades
+        from trade_model import trades_from_dicts
+
+        if __name__ == '__main__':
+            arrays = build_trade_arrays(group_trades_by_window(trades_from_dicts(generate_trades(50, seed=5))))
+            configs = generate_all_configs()[::300]
+            serial = dict(run_sweep(arrays, configs, exact=True, prune=False))
+            parallel = dict(run_sweep(arrays, configs, workers=3, exact=True))
+            assert serial == parallel
+    """)
+    done = subprocess.run([sys.executable, '-c', script], cwd=ROOT, capture_output=True, text=True, timeout=120)
+    assert done.returncode == 0, done.stderr
+    assert done.stderr == ''
+
+def _arrays(seed):
+    trades = generate_trades(60, trades_per_window=2, flip_prob=0.2, seed=seed)
+    return build_trade_arrays(group_trades_by_window(trades_from_dicts(trades)))
+
+@pytest.mark.parametrize('memo_results', [sweep.PRUNE_MEMO_RESULTS, 3], ids=['memo', 'tiny-memo'])
+@pytest.mark.parametrize('exact', [False, True], ids=['log', 'exact'])
+def test_pruned_sweep_matches_unpruned(monkeypatch, memo_results, exact):
+    monkeypatch.setattr(sweep, 'PRUNE_MEMO_RESULTS', memo_results)
+    arrays = _arrays(9)
+    grid = generate_all_configs()
+    # A dense slice, where many caps are above anything observed, plus repeated configs
+    configs = grid[:3000] + grid[:40] + grid[::500]
+    stats = {}
+    pruned = list(run_sweep(arrays, configs, exact=exact, stats=stats))
+    unpruned = dict(run_sweep(arrays, configs, exact=exact, prune=False))
+
+    assert sorted(i for i, _ in pruned) == list(range(len(configs)))
+    assert dict(pruned) == unpruned
+    assert stats['configs'] == len(configs)
+    assert stats['saved'] == len(configs) - stats['simulations'] > 0
+    assert stats['distinct_selections'] < stats['selections']
+
+def test_pruned_sweeps_match_unpruned_per_dataset():
+    datasets = [_arrays(9), _arrays(10)]
+    configs = generate_all_configs()[:2000]
+    stats = {}
+    pruned = {(d, i): result for d, i, result in run_sweeps(datasets, configs, stats=stats)}
+    unpruned = {(d, i): result for d, i, result in run_sweeps(datasets, configs, prune=False)}
+    assert pruned == unpruned
+    assert [s['configs'] for s in stats['datasets']] == [len(configs)] * 2
@@ -0,0 +1,64 @@
+"""Resuming sweeps from a checkpoint"""
+
+import pytest
+
+from analyze_optimal_config import generate_all_configs, group_trades_by_window
+from backtest_engine import build_trade_arrays, slice_windows
+from sweep import run_sweep
+from sweep_checkpoint import StateRecorder, load_checkpoint
+from synthetic_trades import generate_trades
+from trade_model import trades_from_dicts
+
+def arrays_for(windows):
+    trades = generate_trades(windows=windows, trades_per_window=3, flip_prob=0.2, seed=4)
+    return build_trade_arrays(group_trades_by_window(trades_from_dicts(trades)))
+
+def checkpoint_sweep(path, arrays, configs, exact):
+    """One checkpointed run: resume if possible, sweep, save the end states"""
+    resume = load_checkpoint(path, arrays, configs, exact)
+    sweep_arrays, start_states = arrays, None
+    if resume:
+        first_window, start_states = resume
+        sweep_arrays = slice_windows(arrays, first_window)
+
+    recorder = StateRecorder(len(configs))
+    results = [None] * len(configs)
+    for i, result in run_sweep(sweep_arrays, configs, start_states=start_states, exact=exact):
+        recorder.record(i, result)
+        results[i] = result
+    recorder.save(path, arrays, configs, exact)
+    return resume, results
+
+@pytest.mark.parametrize('exact', [False, True])
+def test_resume_matches_full_replay(tmp_path, exact):
+    path = str(tmp_path / 'sweep.npz')
+    configs = generate_all_configs()[::1500]
+    # Synthetic windows are generated in order, so the shorter set is a prefix of the longer
+    checkpoint_sweep(path, arrays_for(40), configs, exact)
+    resume, resumed = checkpoint_sweep(path, arrays_for(60), configs, exact)
+    assert resume[0] == 40
+
+    full = dict(run_sweep(arrays_for(60), configs, exact=exact))
+    for i, result in enumerate(resumed):
+        if exact:
+            assert result['final_balance'] == full[i]['final_balance']
+        else:
+            assert result['final_balance'] == pytest.approx(full[i]['final_balance'], rel=1e-9)
+        assert result['total_trades'] == full[i]['total_trades']
+
+def test_resume_without_new_windows(tmp_path):
+    path = str(tmp_path / 'sweep.npz')
+    configs = generate_all_configs()[::1500]
+    _, first = checkpoint_sweep(path, arrays_for(40), configs, exact=False)
+    resume, again = checkpoint_sweep(path, arrays_for(40), configs, exact=False)
+    assert resume[0] == 40
+    assert [r['final_balance'] for r in again] == [r['final_balance'] for r in first]
+
+@pytest.mark.parametrize('saved_exact', [False, True])
+def test_rejects_checkpoint_from_other_mode(tmp_path, saved_exact):
+    path = str(tmp_path / 'sweep.npz')
+    configs = generate_all_configs()[::1500]
+    arrays = arrays_for(40)
+    checkpoint_sweep(path, arrays, configs, saved_exact)
+    assert load_checkpoint(path, arrays, configs, saved_exact) is not None
+    assert load_checkpoint(path, arrays, configs, not saved_exact) is None
@@ -0,0 +1,67 @@
+"""Sidecar cache of parsed trade timestamps"""
+
+import json
+import os
+
+import numpy as np
+import pytest
+
+import time_cache
+from synthetic_trades import generate_trades
+from time_cache import cache_path, load_time_columns
+
+@pytest.fixture
+def export(tmp_path):
+    path = str(tmp_path / 'trades.json')
+    trades = generate_trades(windows=20, seed=2)
+    with open(path, 'w') as f:
+        json.dump({'trades': trades}, f)
+    return path, trades
+
+@pytest.fixture
+def derivations(monkeypatch):
+    """Count how often the columns are actually derived"""
+    calls = []
+    derive = time_cache.derive_time_columns
+    monkeypatch.setattr(time_cache, 'derive_time_columns', lambda trades: calls.append(1) or derive(trades))
+    return calls
+
+def test_second_load_hits_the_cache(export, derivations):
+    path, trades = export
+    first = load_time_columns(path, trades)
+    second = load_time_columns(path, trades)
+    assert len(derivations) == 1
+    np.testing.assert_array_equal(second['entry_minute'], [t['entry_minute'] for t in trades])
+    np.testing.assert_array_equal(second['timestamp_us'], first['timestamp_us'])
+    assert not os.path.exists(cache_path(path) + '.tmp.npz')
+
+def test_touched_file_with_same_content_reuses_the_cache(export, derivations):
+    path, trades = export
+    load_time_columns(path, trades)
+    stat = os.stat(path)
+    os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 10**9))
+    load_time_columns(path, trades)
+    load_time_columns(path, trades)
+    assert len(derivations) == 1
+
+def test_changed_export_rebuilds(export, derivations):
+    path, trades = export
+    load_time_columns(path, trades)
+    trades = trades[:-1]
+    with open(path, 'w') as f:
+        json.dump({'trades': trades}, f)
+    columns = load_time_columns(path, trades)
+    assert len(derivations) == 2
+    assert len(columns['entry_minute']) == len(trades)
+
+def test_corrupt_sidecar_rebuilds(export, derivations):
+    path, trades = export
+    load_time_columns(path, trades)
+    with open(cache_path(path), 'r+b') as f:
+        f.truncate(os.path.getsize(cache_path(path)) // 2)
+    columns = load_time_columns(path, trades)
+    assert len(derivations) == 2
+    np.testing.assert_array_equal(columns['entry_minute'], [t['entry_minute'] for t in trades])
+    # The rebuilt sidecar is whole again
+    load_time_columns(path, trades)
+    assert len(derivations) == 2
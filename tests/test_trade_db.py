@@ -0,0 +1,69 @@
+"""SQLite trade loading, on small fixture databases"""
+
+import sqlite3
+from datetime import datetime, timedelta, timezone
+
+import pytest
+
+from trade_db import first_window_since, load_trade_arrays, load_trades_by_window
+
+START = datetime(2026, 3, 1, 12, 0, tzinfo=timezone.utc)
+
+FORMATS = {
+    'z': lambda moment: moment.strftime('%Y-%m-%dT%H:%M:%SZ'),
+    'offset': lambda moment: moment.isoformat(),
+    'space': lambda moment: moment.strftime('%Y-%m-%d %H:%M:%S'),
+}
+
+def make_db(path, fmt, windows=4):
+    conn = sqlite3.connect(path)
+    conn.execute("CREATE TABLE trades (timestamp TEXT, window_start TEXT, entry_minute INTEGER, "
+                 "direction TEXT, buy_price REAL, result TEXT, profit REAL)")
+    rows = []
+    for w in range(windows):
+        window_start = START + timedelta(minutes=15 * w)
+        # Inserted out of minute order, plus an unsettled trade the loader skips
+        for minute, direction, result in ((3, 'DOWN', 'LOSS'), (1, 'UP', 'WIN'), (5, 'UP', 'PENDING')):
+            timestamp = window_start + timedelta(minutes=minute - 1)
+            rows.append((FORMATS[fmt](timestamp), FORMATS[fmt](window_start), minute, direction, 0.6, result,
+                         0.5 if result == 'WIN' else -1.0))
+    conn.executemany("INSERT INTO trades VALUES (?, ?, ?, ?, ?, ?, ?)", rows)
+    conn.commit()
+    conn.close()
+    return str(path)
+
+@pytest.mark.parametrize('fmt', sorted(FORMATS))
+def test_loads_windows_in_order(tmp_path, fmt):
+    arrays = load_trade_arrays(make_db(tmp_path / 'trades.db', fmt))
+    assert arrays['window_starts'] == [FORMATS[fmt](START + timedelta(minutes=15 * w)) for w in range(4)]
+    assert arrays['window_offsets'].tolist() == [0, 2, 4, 6, 8]
+    assert arrays['entry_minute'].tolist() == [1, 3] * 4
+    assert arrays['buy_price_cents'].tolist() == [60.0] * 8
+    assert arrays['is_win'].tolist() == [True, False] * 4
+
+@pytest.mark.parametrize('fmt', sorted(FORMATS))
+def test_since_filters_whole_windows_in_any_stored_format(tmp_path, fmt):
+    db = make_db(tmp_path / 'trades.db', fmt)
+    windows = load_trades_by_window(db, since=START + timedelta(minutes=20))
+    assert list(windows) == [FORMATS[fmt](START + timedelta(minutes=15 * w)) for w in (2, 3)]
+    assert all(len(trades) == 2 for trades in windows.values())
+
+    # A naive cutoff is taken as UTC; an exact window start is included
+    assert len(load_trades_by_window(db, since=datetime(2026, 3, 1, 12, 15))) == 3
+    assert load_trades_by_window(db, since=START + timedelta(days=1)) == {}
+
+def test_days_counts_back_from_now(tmp_path):
+    db = make_db(tmp_path / 'trades.db', 'z')
+    assert load_trades_by_window(db, days=1) == {}
+    assert len(load_trades_by_window(db, days=(datetime.now(timezone.utc) - START).days + 1)) == 4
+
+def test_rejects_window_starts_that_do_not_sort_as_text(tmp_path):
+    db = tmp_path / 'trades.db'
+    conn = sqlite3.connect(db)
+    conn.execute("CREATE TABLE trades (window_start TEXT)")
+    # Text order puts 12:00+05:00 (07:00 UTC) after 10:00Z
+    conn.executemany("INSERT INTO trades VALUES (?)",
+                     [('2026-03-01T10:00:00Z',), ('2026-03-01T12:00:00+05:00',)])
+    with pytest.raises(ValueError, match='chronologically'):
+        first_window_since(conn, START)
+    conn.close()
@@ -0,0 +1,60 @@
+"""Trade records, label codes and window grouping"""
+
+import pytest
+
+import trade_model
+from trade_model import (DOWN, LOSS, UP, WIN, Trade, direction_code, group_by_window, result_code,
+                         trades_from_dicts)
+
+def _trade(**overrides):
+    trade = {'window_start': '2026-02-09T13:00:00+00:00', 'entry_minute': 3, 'direction': 'UP',
+             'result': 'WIN', 'buy_price_cents': 55, 'profit': 0.8}
+    trade.update(overrides)
+    return trade
+
+def test_from_dict_defaults():
+    trade = Trade.from_dict(_trade(profit=None))
+    assert trade.profit == 0.0
+    assert Trade.from_dict({k: v for k, v in _trade().items() if k != 'profit'}).profit == 0.0
+    assert Trade.from_dict({k: v for k, v in _trade().items() if k != 'entry_minute'}).entry_minute is None
+    assert (trade.direction, trade.result, trade.buy_price_cents) == (UP, WIN, 55)
+    assert (trade.direction_label, trade.result_label, trade.is_win) == ('UP', 'WIN', True)
+
+def test_slots_reject_unknown_attributes():
+    trade = Trade.from_dict(_trade())
+    with pytest.raises(AttributeError):
+        trade.note = 'x'
+    assert not hasattr(trade, '__dict__')
+
+def test_trades_from_dicts_share_window_strings():
+    # Built at runtime so the two equal strings are distinct objects
+    a, b = ''.join(['2026-02-09T13:', '15:00+00:00']), ''.join(['2026-02-09T13:1', '5:00+00:00'])
+    assert a == b and a is not b
+    first, second = trades_from_dicts([_trade(window_start=a), _trade(window_start=b)])
+    assert first.window_start is second.window_start
+
+def test_codes_are_stable_and_new_labels_append():
+    assert (direction_code('UP'), direction_code('DOWN')) == (UP, DOWN)
+    assert (result_code('LOSS'), result_code('WIN')) == (LOSS, WIN)
+    try:
+        code = result_code('PUSH')
+        assert code == 2 and result_code('PUSH') == code
+        assert trade_model.RESULT_LABELS[code] == 'PUSH'
+        assert Trade.from_dict(_trade(result='PUSH')).result_label == 'PUSH'
+    finally:
+        trade_model._result_codes.pop('PUSH', None)
+        if trade_model.RESULT_LABELS[-1] == 'PUSH':
+            trade_model.RESULT_LABELS.pop()
+
+def test_group_by_window_sorts_each_window_by_entry_minute():
+    trades = trades_from_dicts([
+        _trade(window_start='w2', entry_minute=9),
+        _trade(window_start='w1', entry_minute=7, direction='DOWN'),
+        _trade(window_start='w2', entry_minute=1),
+        _trade(window_start='w1', entry_minute=2),
+    ])
+    windows = group_by_window(trades)
+    assert list(windows) == ['w2', 'w1']
+    assert [t.entry_minute for t in windows['w1']] == [2, 7]
+    assert [t.entry_minute for t in windows['w2']] == [1, 9]
+    assert windows['w1'][1].direction == DOWN
@@ -0,0 +1,40 @@
+"""Columnar trade stores against the JSON loading path"""
+
+import json
+
+import numpy as np
+import pytest
+
+from backtest_engine import build_trade_arrays
+from datasets import load_json_trades
+from synthetic_trades import generate_trades
+from trade_model import group_by_window
+from trade_store import convert_trades_json, open_trade_store, store_trade_arrays
+
+COMPARED = ('window_offsets', 'window_idx', 'entry_minute', 'direction', 'result', 'buy_price_cents',
+            'profit', 'is_win', 'odds', 'window_first_flip', 'window_profit')
+
+def write_export(path, backup_format):
+    trades = generate_trades(windows=30, trades_per_window=3, flip_prob=0.3, seed=8)
+    # Recorded profit may be null or absent; both count as 0
+    trades[0]['profit'] = None
+    del trades[1]['profit']
+    if backup_format:
+        for trade in trades:
+            del trade['entry_minute']
+    with open(path, 'w') as f:
+        json.dump({'trades': trades}, f)
+
+@pytest.mark.parametrize('backup_format', [False, True], ids=['trades', 'backup'])
+def test_store_matches_json_arrays(tmp_path, backup_format):
+    export = str(tmp_path / 'trades.json')
+    write_export(export, backup_format)
+    convert_trades_json(export, str(tmp_path / 'store'))
+
+    stored = store_trade_arrays(open_trade_store(str(tmp_path / 'store')))
+    loaded = build_trade_arrays(group_by_window(load_json_trades(export)))
+
+    assert stored['window_starts'] == loaded['window_starts']
+    for column in COMPARED:
+        np.testing.assert_array_equal(stored[column], loaded[column], err_msg=column)
+    assert not np.isnan(stored['profit']).any()
@@ -0,0 +1,50 @@
+"""Chunked JSON decoding of trade exports at every chunk boundary"""
+
+import json
+
+import numpy as np
+import pytest
+
+from datasets import load_dataset
+from synthetic_trades import generate_trades
+from trade_stream import iter_trade_dicts
+
+TRADES = [
+    {'window_start': '2026-02-09T13:00:00+00:00', 'entry_minute': 3, 'direction': 'UP',
+     'result': 'WIN', 'buy_price_cents': 55, 'profit': 0.8182},
+    {'window_start': '2026-02-09T13:15:00+00:00', 'entry_minute': 11, 'direction': 'DOWN',
+     'result': 'LOSS', 'buy_price_cents': 62.5, 'profit': -1e-3},
+]
+
+FIXTURES = {
+    'number_before_trades': '{"z": 1.5e10, "trades": []}',
+    'number_after_trades': '{"trades": [], "z": 1.5e10}',
+    'compact': json.dumps({'trades': TRADES, 'count': 2}, separators=(',', ':')),
+    'indented_metadata_first': json.dumps({'exported_at': '2026-02-10T00:00:00Z', 'version': 12.25,
+                                           'stats': {'wins': 1, 'losses': 1}, 'trades': TRADES,
+                                           'total': -42}, indent=2),
+}
+
+@pytest.mark.parametrize('name', sorted(FIXTURES))
+def test_every_chunk_size_matches_json_load(tmp_path, name):
+    path = tmp_path / f'{name}.json'
+    path.write_text(FIXTURES[name])
+    expected = json.loads(FIXTURES[name])['trades']
+    for chunk_size in range(1, len(FIXTURES[name]) + 1):
+        assert list(iter_trade_dicts(str(path), chunk_size)) == expected, chunk_size
+
+def test_streamed_load_keeps_recorded_entry_minutes(tmp_path):
+    trades = generate_trades(windows=20, trades_per_window=3, seed=4)
+    for k, trade in enumerate(trades):
+        if k % 2:
+            del trade['entry_minute']
+        else:
+            # Disagrees with the timestamp, so a derived value would show
+            trade['entry_minute'] = trade['entry_minute'] % 13 + 1
+    path = tmp_path / 'mixed.json'
+    path.write_text(json.dumps({'trades': trades}))
+
+    streamed = load_dataset(str(path), stream=7)
+    loaded = load_dataset(str(path))
+    for column in ('window_offsets', 'entry_minute', 'direction', 'result', 'buy_price_cents'):
+        np.testing.assert_array_equal(streamed[column], loaded[column], err_msg=column)
@@ -0,0 +1,139 @@
+"""
+Pre-parsed trade timestamps for the BTC Scalper analyzers
+Parses ISO timestamps in one vectorized pass and keeps the derived columns
+(epoch microseconds, entry_minute, window index) in a sidecar cache next to the
+JSON export, so repeated runs skip the datetime parsing entirely
+"""
+
+import hashlib
+import json
+import os
+import zipfile
+from datetime import datetime, timedelta, timezone
+
+import numpy as np
+
+CACHE_VERSION = 1
+
+EPOCH = datetime(1970, 1, 1, tzinfo=timezone.utc)
+
+def parse_iso_utc(values):
+    """
+    ISO-8601 UTC timestamps -> int64 microseconds since the epoch
+
+    Z / +00:00 suffixed values go through NumPy's datetime64 parser in one
+    pass; anything with another offset falls back to datetime.fromisoformat.
+    """
+    naive = []
+    fallback = []
+    for i, value in enumerate(values):
+        if value.endswith('Z'):
+            naive.append(value[:-1])
+        elif value.endswith('+00:00'):
+            naive.append(value[:-6])
+        elif '+' in value[10:] or '-' in value[10:]:
+            naive.append('NaT')
+            fallback.append(i)
+        else:
+            naive.append(value)
+
+    micros = np.array(naive, dtype='datetime64[us]').astype(np.int64)
+    for i in fallback:
+        micros[i] = (datetime.fromisoformat(values[i]) - EPOCH) // timedelta(microseconds=1)
+    return micros
+
+def _entry_times(trades):
+    """Parsed timestamp and window_start of every trade, plus the 1-indexed entry_minute"""
+    timestamp_us = parse_iso_utc([t['timestamp'] for t in trades])
+    window_start_us = parse_iso_utc([t['window_start'] for t in trades])
+
+    # Same arithmetic as (timestamp - window_start).total_seconds() / 60, truncated
+    minutes = (timestamp_us - window_start_us) / 1e6 / 60
+    entry_minute = np.trunc(minutes).astype(np.int64) + 1
+    return timestamp_us, window_start_us, entry_minute
+
+def derive_entry_minutes(trades):
+    """1-indexed entry_minute of every trade, from its timestamp and window_start"""
+    return _entry_times(trades)[2]
+
+def derive_time_columns(trades):
+    """Epoch timestamps, 1-indexed entry_minute and sorted window index for every trade"""
+    timestamp_us, window_start_us, entry_minute = _entry_times(trades)
+    window_labels = [t['window_start'] for t in trades]
+
+    window_starts, window_idx = np.unique(np.array(window_labels, dtype=str), return_inverse=True)
+
+    return {
+        'timestamp_us': timestamp_us,
+        'window_start_us': window_start_us,
+        'entry_minute': entry_minute,
+        'window_idx': window_idx.astype(np.int64),
+        'window_starts': window_starts,
+    }
+
+def file_digest(path):
+    """SHA-256 of a file, read in 1 MB blocks"""
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(1 << 20), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+def cache_path(json_path):
+    return json_path + '.times.npz'
+
+def load_time_columns(json_path, trades):
+    """
+    Derived time columns for the trades of json_path, from the sidecar cache when valid
+
+    The cache is trusted while the source's size and mtime are unchanged. If
+    only the mtime moved (e.g. the file was copied), the content hash decides
+    whether it can still be used. Otherwise, or if the sidecar cannot be
+    read, the columns are rebuilt and saved.
+    """
+    stat = os.stat(json_path)
+    sidecar = cache_path(json_path)
+    digest = None
+
+    cached = _read_cache(sidecar) if os.path.exists(sidecar) else None
+    if cached is not None:
+        meta, columns = cached
+        valid = (meta['version'] == CACHE_VERSION and
+                 meta['size'] == stat.st_size and
+                 meta['count'] == len(trades))
+        if valid and meta['mtime_ns'] == stat.st_mtime_ns:
+            return columns
+        if valid:
+            digest = file_digest(json_path)
+            if meta['sha256'] == digest:
+                # Same content under a new mtime: refresh the cache key and reuse the columns
+                _save_cache(sidecar, stat, digest, len(trades), columns)
+                return columns
+
+    columns = derive_time_columns(trades)
+    _save_cache(sidecar, stat, digest or file_digest(json_path), len(trades), columns)
+    return columns
+
+def _read_cache(sidecar):
+    """(meta, columns) of a sidecar, or None if it is unreadable"""
+    try:
+        with np.load(sidecar) as cached:
+            meta = json.loads(str(cached['meta']))
+            columns = {name: cached[name] for name in cached.files if name != 'meta'}
+    except (OSError, ValueError, KeyError, zipfile.BadZipFile):
+        return None
+    return meta, columns
+
+def _save_cache(sidecar, stat, digest, count, columns):
+    meta = {
+        'version': CACHE_VERSION,
+        'size': stat.st_size,
+        'mtime_ns': stat.st_mtime_ns,
+        'sha256': digest,
+        'count': count,
+    }
+    # Write then rename so an interrupted run never leaves a truncated sidecar behind
+    # (np.savez appends .npz unless the name already ends with it)
+    tmp_path = sidecar + '.tmp.npz'
+    np.savez(tmp_path, meta=np.array(json.dumps(meta)), **columns)
+    os.replace(tmp_path, sidecar)
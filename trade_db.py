@@ -0,0 +1,180 @@
+"""
+SQLite trade loader for the BTC Scalper analyzers
+Reads trades straight from the bot's data/trades.db in window order, in
+fetchmany batches, instead of going through a JSON export
+"""
+
+import sqlite3
+from datetime import datetime, timedelta, timezone
+
+import numpy as np
+
+from backtest_engine import finish_trade_arrays
+from time_cache import EPOCH, parse_iso_utc
+from trade_model import DIRECTION_LABELS, RESULT_LABELS, Trade, direction_code, result_code
+
+DEFAULT_DB = 'data/trades.db'
+
+# Indexes the window-ordered and time-ranged loads rely on
+INDEXES = {
+    'idx_trades_window_minute': ('window_start', 'entry_minute'),
+    'idx_trades_timestamp': ('timestamp',),
+}
+
+def trade_columns(conn):
+    """Column names of the trades table"""
+    return {row[1] for row in conn.execute("PRAGMA table_info(trades)")}
+
+def ensure_indexes(conn):
+    """Create the loader's indexes if they are missing; returns the names created"""
+    columns = trade_columns(conn)
+    existing = {row[0] for row in conn.execute(
+        "SELECT name FROM sqlite_master WHERE type = 'index' AND tbl_name = 'trades'")}
+
+    created = []
+    for name, index_columns in INDEXES.items():
+        if name in existing or not set(index_columns) <= columns:
+            continue
+        try:
+            conn.execute(f"CREATE INDEX IF NOT EXISTS {name} ON trades ({', '.join(index_columns)})")
+        except sqlite3.OperationalError as e:
+            # Read-only copies of the database still load, just without the index
+            print(f"Could not create index {name}: {e}")
+            continue
+        created.append(name)
+    conn.commit()
+    return created
+
+def first_window_since(conn, since):
+    """
+    Stored window_start of the first window starting at or after since, or None
+
+    The loader orders windows by their window_start text, as the JSON path
+    does, so the stored values must sort chronologically as text. Each value
+    is parsed with parse_iso_utc (Z, +00:00, other offsets or naive UTC) and
+    the cutoff is returned in the database's own format, which keeps the
+    range filter a plain indexed text comparison. Raises ValueError if the
+    stored order is not chronological.
+    """
+    labels = [row[0] for row in conn.execute(
+        "SELECT DISTINCT window_start FROM trades ORDER BY window_start")]
+    if not labels:
+        return None
+
+    starts = parse_iso_utc(labels)
+    if (np.diff(starts) < 0).any():
+        raise ValueError("window_start values in the trades table do not sort chronologically as text "
+                         "(mixed timestamp formats or offsets?)")
+
+    if since.tzinfo is None:
+        since = since.replace(tzinfo=timezone.utc)
+    since_us = (since - EPOCH) // timedelta(microseconds=1)
+    first = int(np.searchsorted(starts, since_us, side='left'))
+    return labels[first] if first < len(labels) else None
+
+def _trade_query(conn, days=None, since=None):
+    """SELECT for the simulator's columns, ordered by window then entry minute"""
+    columns = trade_columns(conn)
+    missing = {'window_start', 'entry_minute', 'direction', 'result'} - columns
+    if missing:
+        raise ValueError(f"trades table is missing required columns: {', '.join(sorted(missing))}")
+
+    if 'buy_price_cents' in columns:
+        price = 'buy_price_cents'
+    elif 'buy_price' in columns:
+        price = 'ROUND(buy_price * 100)'
+    else:
+        raise ValueError("trades table has neither buy_price_cents nor buy_price")
+    profit = 'COALESCE(profit, 0)' if 'profit' in columns else '0'
+
+    where = ["result IN ('WIN', 'LOSS')"]
+    params = []
+    if days is not None:
+        since = datetime.now(timezone.utc) - timedelta(days=days)
+    if since is not None:
+        # Filter on window_start so windows are never cut in half
+        first_window = first_window_since(conn, since)
+        if first_window is None:
+            where.append("0")
+        else:
+            where.append("window_start >= ?")
+            params.append(first_window)
+
+    sql = (f"SELECT window_start, entry_minute, direction, {price}, result, {profit} "
+           f"FROM trades WHERE {' AND '.join(where)} "
+           f"ORDER BY window_start, entry_minute, rowid")
+    return sql, params
+
+def iter_trade_rows(db_path=DEFAULT_DB, days=None, since=None, batch_size=10000):
+    """
+    Yield batches of (window_start, entry_minute, direction, buy_price_cents, result, profit) rows
+
+    Rows arrive sorted by (window_start, entry_minute), ties in insertion
+    order, which is exactly the order group_trades_by_window produces.
+    """
+    conn = sqlite3.connect(db_path)
+    try:
+        ensure_indexes(conn)
+        sql, params = _trade_query(conn, days, since)
+        cursor = conn.execute(sql, params)
+        cursor.arraysize = batch_size
+        while True:
+            rows = cursor.fetchmany()
+            if not rows:
+                break
+            yield rows
+    finally:
+        conn.close()
+
+def load_trades_by_window(db_path=DEFAULT_DB, days=None, since=None, batch_size=10000):
+    """Trade records grouped by window_start, already in window and entry_minute order"""
+    windows = {}
+    current_start = None
+    current = None
+    for rows in iter_trade_rows(db_path, days, since, batch_size):
+        for window_start, entry_minute, direction, buy_price_cents, result, profit in rows:
+            if window_start != current_start:
+                current_start = window_start
+                current = windows[window_start] = []
+            current.append(Trade(current_start, entry_minute, direction_code(direction),
+                                 result_code(result), buy_price_cents, profit))
+    return windows
+
+def load_trade_arrays(db_path=DEFAULT_DB, days=None, since=None, batch_size=10000):
+    """Engine trade arrays built batch by batch from the database, without per-trade dicts"""
+    window_starts = []
+    window_sizes = []
+    entry_minute = []
+    direction = []
+    result = []
+    buy_price_cents = []
+    profit = []
+
+    for rows in iter_trade_rows(db_path, days, since, batch_size):
+        for window_start, minute, trade_direction, price, trade_result, trade_profit in rows:
+            if not window_starts or window_start != window_starts[-1]:
+                window_starts.append(window_start)
+                window_sizes.append(0)
+            window_sizes[-1] += 1
+            entry_minute.append(minute)
+            direction.append(direction_code(trade_direction))
+            result.append(result_code(trade_result))
+            buy_price_cents.append(price)
+            profit.append(trade_profit)
+
+    counts = np.array(window_sizes, dtype=np.int64)
+    offsets = np.zeros(len(window_starts) + 1, dtype=np.int64)
+    np.cumsum(counts, out=offsets[1:])
+
+    return finish_trade_arrays({
+        'window_starts': window_starts,
+        'direction_labels': list(DIRECTION_LABELS),
+        'result_labels': list(RESULT_LABELS),
+        'window_idx': np.repeat(np.arange(len(window_starts), dtype=np.int64), counts),
+        'window_offsets': offsets,
+        'entry_minute': np.array(entry_minute, dtype=np.int64),
+        'direction': np.array(direction, dtype=np.int8),
+        'result': np.array(result, dtype=np.int8),
+        'buy_price_cents': np.array(buy_price_cents, dtype=np.float64),
+        'profit': np.array(profit, dtype=np.float64),
+    })
@@ -0,0 +1,101 @@
+"""
+Compact trade model shared by the BTC Scalper analyzers
+Trades are __slots__ records with direction and result encoded as small ints,
+instead of JSON dicts keyed and valued by strings
+"""
+
+import json
+from collections import defaultdict
+
+# Code -> label. Labels outside these are appended on first sight, so codes stay stable
+DIRECTION_LABELS = ['UP', 'DOWN']
+RESULT_LABELS = ['LOSS', 'WIN']
+
+UP, DOWN = 0, 1
+LOSS, WIN = 0, 1
+
+_direction_codes = {label: code for code, label in enumerate(DIRECTION_LABELS)}
+_result_codes = {label: code for code, label in enumerate(RESULT_LABELS)}
+
+def _code(label, codes, labels):
+    code = codes.get(label)
+    if code is None:
+        code = codes[label] = len(labels)
+        labels.append(label)
+    return code
+
+def direction_code(label):
+    """Small-int code of a direction label ('UP' -> 0, 'DOWN' -> 1)"""
+    return _code(label, _direction_codes, DIRECTION_LABELS)
+
+def result_code(label):
+    """Small-int code of a result label ('LOSS' -> 0, 'WIN' -> 1)"""
+    return _code(label, _result_codes, RESULT_LABELS)
+
+class Trade:
+    """One trade: about a quarter of the memory of its JSON dict, and no string compares"""
+
+    __slots__ = ('window_start', 'entry_minute', 'direction', 'result', 'buy_price_cents', 'profit')
+
+    def __init__(self, window_start, entry_minute, direction, result, buy_price_cents, profit=0.0):
+        self.window_start = window_start
+        self.entry_minute = entry_minute
+        self.direction = direction
+        self.result = result
+        self.buy_price_cents = buy_price_cents
+        self.profit = profit
+
+    @classmethod
+    def from_dict(cls, trade, window_starts=None):
+        """
+        Record for a trade dict from a JSON export or the database
+
+        window_starts, if given, is a dict used to share one string object
+        per window between all the trades of that window.
+        """
+        window_start = trade['window_start']
+        if window_starts is not None:
+            window_start = window_starts.setdefault(window_start, window_start)
+        return cls(window_start,
+                   trade.get('entry_minute'),
+                   direction_code(trade['direction']),
+                   result_code(trade['result']),
+                   trade['buy_price_cents'],
+                   trade.get('profit') or 0.0)
+
+    @property
+    def is_win(self):
+        return self.result == WIN
+
+    @property
+    def direction_label(self):
+        return DIRECTION_LABELS[self.direction]
+
+    @property
+    def result_label(self):
+        return RESULT_LABELS[self.result]
+
+    def __repr__(self):
+        return (f"Trade({self.window_start!r}, min {self.entry_minute}, {self.direction_label}, "
+                f"{self.result_label}, {self.buy_price_cents}¢)")
+
+def trades_from_dicts(trades):
+    """Trade records for a list of trade dicts"""
+    window_starts = {}
+    return [Trade.from_dict(trade, window_starts) for trade in trades]
+
+def load_trades(path):
+    """Trade records from a JSON export ({'trades': [...]})"""
+    with open(path, 'r') as f:
+        return trades_from_dicts(json.load(f)['trades'])
+
+def group_by_window(trades):
+    """Group trade records by window_start and sort each window by entry_minute"""
+    windows = defaultdict(list)
+    for trade in trades:
+        windows[trade.window_start].append(trade)
+
+    for window in windows.values():
+        window.sort(key=lambda t: t.entry_minute)
+
+    return windows
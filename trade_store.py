@@ -0,0 +1,128 @@
+"""
+Binary columnar trade store for the BTC Scalper analyzers
+Converts a JSON trade export into one .npy file per column that the optimizers
+memory-map on startup instead of parsing JSON
+
+Usage:
+    python trade_store.py data/trades.json data/trades_store
+    python trade_store.py data/trades_backup_v1.json data/trades_backup_v1_store
+"""
+
+import json
+import os
+import sys
+
+import numpy as np
+
+from backtest_engine import finish_trade_arrays
+from time_cache import derive_time_columns, parse_iso_utc
+from trade_model import DIRECTION_LABELS, RESULT_LABELS, direction_code, result_code
+
+STORE_FORMAT = 1
+
+# Column name -> dtype written by convert_trades_json
+COLUMNS = {
+    'window_idx': np.int32,
+    'window_offsets': np.int64,
+    'timestamp_us': np.int64,
+    'entry_minute': np.int16,
+    'direction': np.int8,
+    'result': np.int8,
+    'buy_price_cents': np.float64,
+    'profit': np.float64,
+}
+
+def convert_trades_json(json_path, store_dir):
+    """
+    Write the trades of a JSON export as a columnar store
+
+    Trades are stored sorted by (window_start, entry_minute), keeping file
+    order for ties, so the columns load straight into engine order. Exports
+    without entry_minute (the backup format) get it derived from timestamps.
+    """
+    with open(json_path, 'r') as f:
+        trades = json.load(f)['trades']
+
+    missing = [t for t in trades if 'entry_minute' not in t]
+    if missing:
+        for trade, minute in zip(missing, derive_time_columns(missing)['entry_minute'].tolist()):
+            trade['entry_minute'] = minute
+
+    window_starts = sorted({t['window_start'] for t in trades})
+    window_lookup = {w: i for i, w in enumerate(window_starts)}
+    trades = sorted(trades, key=lambda t: (window_lookup[t['window_start']], t['entry_minute']))
+
+    columns = {name: [] for name in COLUMNS if name not in ('window_offsets', 'timestamp_us')}
+    for trade in trades:
+        columns['window_idx'].append(window_lookup[trade['window_start']])
+        columns['entry_minute'].append(trade['entry_minute'])
+        columns['direction'].append(direction_code(trade['direction']))
+        columns['result'].append(result_code(trade['result']))
+        columns['buy_price_cents'].append(trade['buy_price_cents'])
+        columns['profit'].append(trade.get('profit') or 0.0)
+
+    timestamps = [t.get('timestamp') for t in trades]
+    columns['timestamp_us'] = parse_iso_utc(timestamps) if all(timestamps) else np.zeros(len(trades))
+
+    counts = np.bincount(np.array(columns['window_idx'], dtype=np.int64), minlength=len(window_starts))
+    offsets = np.zeros(len(window_starts) + 1, dtype=np.int64)
+    np.cumsum(counts, out=offsets[1:])
+    columns['window_offsets'] = offsets
+
+    os.makedirs(store_dir, exist_ok=True)
+    for name, dtype in COLUMNS.items():
+        np.save(os.path.join(store_dir, f'{name}.npy'), np.asarray(columns[name], dtype=dtype))
+    np.save(os.path.join(store_dir, 'window_starts.npy'), np.array(window_starts, dtype=str))
+
+    meta = {
+        'format': STORE_FORMAT,
+        'source': os.path.basename(json_path),
+        'trades': len(trades),
+        'windows': len(window_starts),
+        'direction_labels': list(DIRECTION_LABELS),
+        'result_labels': list(RESULT_LABELS),
+    }
+    with open(os.path.join(store_dir, 'meta.json'), 'w') as f:
+        json.dump(meta, f, indent=2)
+
+    return meta
+
+def open_trade_store(store_dir):
+    """Memory-map every column of a store; nothing is parsed or copied"""
+    with open(os.path.join(store_dir, 'meta.json'), 'r') as f:
+        meta = json.load(f)
+    if meta.get('format') != STORE_FORMAT:
+        raise ValueError(f"Unsupported trade store format in {store_dir}: {meta.get('format')}")
+
+    store = {'meta': meta}
+    for name in list(COLUMNS) + ['window_starts']:
+        store[name] = np.load(os.path.join(store_dir, f'{name}.npy'), mmap_mode='r')
+    return store
+
+def store_trade_arrays(store):
+    """Engine trade arrays backed by the store's memory-mapped columns"""
+    meta = store['meta']
+    return finish_trade_arrays({
+        'window_starts': store['window_starts'].tolist(),
+        'direction_labels': meta['direction_labels'],
+        'result_labels': meta['result_labels'],
+        'window_idx': store['window_idx'],
+        'window_offsets': store['window_offsets'],
+        'entry_minute': store['entry_minute'],
+        'direction': store['direction'],
+        'result': store['result'],
+        'buy_price_cents': store['buy_price_cents'],
+        'profit': store['profit'],
+    })
+
+def main():
+    if len(sys.argv) != 3:
+        print(__doc__.strip())
+        sys.exit(1)
+
+    json_path, store_dir = sys.argv[1], sys.argv[2]
+    meta = convert_trades_json(json_path, store_dir)
+    print(f"Wrote {meta['trades']} trades across {meta['windows']} windows to {store_dir}")
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,136 @@
+"""
+Streaming JSON ingestion for the BTC Scalper analyzers
+Reads a {"trades": [...]} export in fixed-size chunks and decodes one trade
+object at a time, so the raw JSON tree of a multi-GB export is never held in
+memory; trades go straight into compact per-window Trade records
+"""
+
+import json
+
+from trade_model import Trade
+
+CHUNK_SIZE = 1 << 20
+BATCH_SIZE = 10000
+
+_WHITESPACE = ' \t\n\r'
+_DELIMITERS = ',}]' + _WHITESPACE
+
+class _Reader:
+    """Chunked text buffer with just enough of a tokenizer for the export's outer structure"""
+
+    def __init__(self, f, chunk_size):
+        self.f = f
+        self.chunk_size = chunk_size
+        self.buf = ''
+        self.pos = 0
+        self.eof = False
+
+    def _fill(self):
+        chunk = self.f.read(self.chunk_size)
+        if not chunk:
+            self.eof = True
+            return False
+        self.buf = self.buf[self.pos:] + chunk
+        self.pos = 0
+        return True
+
+    def peek(self):
+        """Next non-whitespace character ('' at end of file)"""
+        while True:
+            while self.pos < len(self.buf) and self.buf[self.pos] in _WHITESPACE:
+                self.pos += 1
+            if self.pos < len(self.buf) or not self._fill():
+                return self.buf[self.pos:self.pos + 1]
+
+    def expect(self, char):
+        if self.peek() != char:
+            raise ValueError(f"Malformed trade export: expected {char!r} at offset {self.pos}")
+        self.pos += 1
+
+    def value(self, decoder):
+        """Decode the next complete JSON value, reading more chunks until it is whole"""
+        self.peek()
+        while True:
+            try:
+                value, end = decoder.raw_decode(self.buf, self.pos)
+            except json.JSONDecodeError:
+                if self.eof or not self._fill():
+                    raise
+                continue
+            # A number cut by the chunk boundary decodes as its prefix ('1.5e10' as '1.5'):
+            # unless a delimiter follows it, it may continue in the next chunk
+            if (isinstance(value, (int, float)) and not self.eof and
+                    (end == len(self.buf) or self.buf[end] not in _DELIMITERS) and self._fill()):
+                continue
+            self.pos = end
+            return value
+
+def iter_trade_dicts(path, chunk_size=CHUNK_SIZE):
+    """
+    Yield the trade dicts of a JSON export one at a time
+
+    Other top-level keys are decoded and skipped, whatever their position;
+    only the current trade object is ever held decoded.
+    """
+    decoder = json.JSONDecoder()
+    with open(path, 'r') as f:
+        reader = _Reader(f, chunk_size)
+        reader.expect('{')
+        if reader.peek() == '}':
+            return
+        while True:
+            key = reader.value(decoder)
+            reader.expect(':')
+            if key != 'trades':
+                reader.value(decoder)
+            else:
+                reader.expect('[')
+                if reader.peek() == ']':
+                    reader.pos += 1
+                else:
+                    while True:
+                        yield reader.value(decoder)
+                        if reader.peek() == ']':
+                            reader.pos += 1
+                            break
+                        reader.expect(',')
+            if reader.peek() == '}':
+                return
+            reader.expect(',')
+
+def iter_trade_batches(path, batch_size=BATCH_SIZE, chunk_size=CHUNK_SIZE):
+    """Lists of up to batch_size trade dicts, in file order"""
+    batch = []
+    for trade in iter_trade_dicts(path, chunk_size):
+        batch.append(trade)
+        if len(batch) >= batch_size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+def stream_trades_by_window(path, batch_size=BATCH_SIZE, entry_minutes=None):
+    """
+    Trade records grouped by window_start and sorted by entry_minute, read batch by batch
+
+    Same result as group_by_window(load_trades(path)), but peak memory is
+    one batch of dicts plus the grouped records. entry_minutes, if given,
+    maps a batch of dicts to an array of their entry_minute values (for
+    exports that only carry timestamps).
+    """
+    windows = {}
+    window_starts = {}
+    for batch in iter_trade_batches(path, batch_size):
+        minutes = entry_minutes(batch).tolist() if entry_minutes else None
+        for k, trade in enumerate(batch):
+            record = Trade.from_dict(trade, window_starts)
+            if minutes is not None:
+                record.entry_minute = minutes[k]
+            window = windows.get(record.window_start)
+            if window is None:
+                window = windows[record.window_start] = []
+            window.append(record)
+
+    for window in windows.values():
+        window.sort(key=lambda t: t.entry_minute)
+    return windows
@@ -0,0 +1,226 @@
+"""
+Walk-forward re-optimization for the BTC Scalper config grid
+Splits the windows into consecutive train / test folds, picks the best config on
+each training span and trades it on the following test span, chaining the test
+spans into one out-of-sample equity curve
+
+Usage:
+    python walk_forward.py                              # 5 rolling folds over data/trades.json
+    python walk_forward.py --train 200 --test 50 --expanding
+    python walk_forward.py --folds 8 --workers 0
+"""
+
+import argparse
+import json
+from functools import partial
+
+import numpy as np
+
+from analyze_optimal_config import (config_to_string, generate_all_configs, group_trades_by_window,
+                                    load_data)
+from backtest_engine import (STARTING_BALANCE, STATE_KEYS, build_trade_arrays,
+                             select_trades, simulate_sizings, take_windows)
+from sweep import group_by_selection, map_group_chunks, resolve_workers
+from trade_db import load_trade_arrays as load_db_trade_arrays
+from trade_store import open_trade_store, store_trade_arrays
+
+def fold_bounds(n_windows, train_windows, test_windows, expanding=False):
+    """
+    [(train_start, train_end, test_end)] window index ranges
+
+    Each test span starts where its training span ends and the next fold
+    starts where the last test span ended. Rolling folds keep train_windows
+    of history; expanding folds train on everything since window 0.
+    """
+    folds = []
+    train_end = train_windows
+    while train_end < n_windows:
+        test_end = min(train_end + test_windows, n_windows)
+        folds.append((0 if expanding else train_end - train_windows, train_end, test_end))
+        train_end = test_end
+    return folds
+
+def _span_winners(spans, arrays, groups, cache):
+    """
+    Best (final_balance, -config_index) of this chunk on each (first_window, end_window) span
+
+    Every selection rule is per window, so a config's executed-trade mask is
+    computed once over the whole history and each span just takes its slice
+    of it; overlapping training spans never recompute a selection.
+    """
+    offsets = arrays['window_offsets']
+    trade_spans = np.array([(offsets[start], offsets[end]) for start, end in spans], dtype=np.int64)
+    best = [None] * len(spans)
+
+    for config, sizings in groups:
+        executed_idx = np.flatnonzero(select_trades(arrays, config, cache))
+        lo, hi = np.searchsorted(executed_idx, trade_spans).T
+        # Log balance after each executed trade (compound_log's closed form), with a leading 0,
+        # so a span's growth is the difference of two entries
+        pcts = np.array([pct for _, pct, _ in sizings])[:, None]
+        wins = arrays['is_win'][executed_idx]
+        log_factors = np.where(wins, np.log1p(pcts * arrays['odds'][executed_idx]), np.log1p(-pcts))
+        level = np.zeros((len(sizings), len(executed_idx) + 1))
+        np.cumsum(log_factors, axis=1, out=level[:, 1:])
+        finals = STARTING_BALANCE * np.exp(level[:, hi] - level[:, lo])
+
+        for k, (i, _, _) in enumerate(sizings):
+            for s, balance in enumerate(finals[k].tolist()):
+                entry = (balance, -i)
+                if best[s] is None or entry > best[s]:
+                    best[s] = entry
+    return best
+
+def span_winners(trade_arrays, configs, spans, workers=1):
+    """config_index of the best final_balance on each window span (ties to the lower index)"""
+    groups = group_by_selection(configs)
+    best = [None] * len(spans)
+    for chunk_best in map_group_chunks(trade_arrays, groups, partial(_span_winners, spans), workers):
+        for s, entry in enumerate(chunk_best):
+            if entry is not None and (best[s] is None or entry > best[s]):
+                best[s] = entry
+    return [-entry[1] for entry in best]
+
+def walk_forward(trade_arrays, configs, folds, workers=1):
+    """
+    Run the grid on every training span and chain the winners over the test spans
+
+    Returns {'folds': [...], 'oos': result, 'in_sample_best': {...}}: per
+    fold the winning config and its train / test numbers, the chained
+    out-of-sample result, and for reference the config that is best over
+    the whole history, scored on the same test windows.
+    """
+    n_windows = len(trade_arrays['window_starts'])
+    spans = [(train_start, train_end) for train_start, train_end, _ in folds] + [(0, n_windows)]
+    winners = span_winners(trade_arrays, configs, spans, workers)
+
+    def run_test(config, test_start, test_end, start):
+        test_arrays = take_windows(trade_arrays, np.arange(test_start, test_end))
+        return simulate_sizings(test_arrays, config, [config['portfolio_pct']],
+                                start_states=[start])[0]
+
+    fold_results = []
+    state = None
+    for (train_start, train_end, test_end), index in zip(folds, winners):
+        config = configs[index]
+        train = simulate_sizings(take_windows(trade_arrays, np.arange(train_start, train_end)),
+                                 config, [config['portfolio_pct']])[0]
+        start_balance = state[0] if state else STARTING_BALANCE
+        trades_before = state[2] if state else 0
+        oos = run_test(config, train_end, test_end, state)
+        state = tuple(oos[key] for key in STATE_KEYS)
+
+        fold_results.append({
+            'train_windows': (train_start, train_end),
+            'test_windows': (train_end, test_end),
+            'test_start': trade_arrays['window_starts'][train_end],
+            'config_index': index,
+            'config': config,
+            'train_final_balance': train['final_balance'],
+            'train_trades': train['total_trades'],
+            'test_return': oos['final_balance'] / start_balance - 1,
+            'test_trades': oos['total_trades'] - trades_before,
+            'equity': oos['final_balance'],
+        })
+
+    # The full-history optimum over the same out-of-sample windows
+    in_sample_config = configs[winners[-1]]
+    in_sample = run_test(in_sample_config, folds[0][1], folds[-1][2], None) if folds else None
+
+    return {
+        'folds': fold_results,
+        'oos': oos if folds else None,
+        'in_sample_best': {
+            'config_index': winners[-1],
+            'config': in_sample_config,
+            'result': in_sample,
+        },
+    }
+
+def _json_result(result):
+    """Result dict with an infinite profit_factor written as null, like optimization_results.json"""
+    if result is None:
+        return None
+    return {key: None if value == float('inf') else value for key, value in result.items()}
+
+def parse_args():
+    parser = argparse.ArgumentParser(description='Walk-forward re-optimization over the config grid')
+    parser.add_argument('--folds', type=int, default=5,
+                        help='number of test folds when --train / --test are not given')
+    parser.add_argument('--train', type=int, metavar='WINDOWS',
+                        help='windows per training span (default: what is left after the test folds)')
+    parser.add_argument('--test', type=int, metavar='WINDOWS',
+                        help='windows per test span (default: windows / (folds + 1))')
+    parser.add_argument('--expanding', action='store_true',
+                        help='train on all windows so far instead of a rolling span')
+    parser.add_argument('--workers', type=int, default=1,
+                        help='worker processes for the grid pass (0 = one per core)')
+    parser.add_argument('--output', default='data/walk_forward_results.json')
+    source = parser.add_mutually_exclusive_group()
+    source.add_argument('--store', metavar='DIR',
+                        help='read trades from a columnar store written by trade_store.py instead of JSON')
+    source.add_argument('--db', metavar='PATH', nargs='?', const='data/trades.db',
+                        help='read trades from the bot\'s SQLite database (default data/trades.db)')
+    parser.add_argument('--days', type=float,
+                        help='with --db, only load windows from the last N days')
+    args = parser.parse_args()
+    if args.days is not None and not args.db:
+        parser.error('--days only applies to --db')
+    return args
+
+def main():
+    args = parse_args()
+
+    print("Loading trade data...")
+    if args.store:
+        trade_arrays = store_trade_arrays(open_trade_store(args.store))
+    elif args.db:
+        trade_arrays = load_db_trade_arrays(args.db, days=args.days)
+    else:
+        trade_arrays = build_trade_arrays(group_trades_by_window(load_data()))
+    n_windows = len(trade_arrays['window_starts'])
+    print(f"Loaded {len(trade_arrays['entry_minute'])} trades across {n_windows} windows")
+
+    test_windows = args.test or max(1, n_windows // (args.folds + 1))
+    train_windows = args.train or max(1, n_windows - args.folds * test_windows)
+    folds = fold_bounds(n_windows, train_windows, test_windows, args.expanding)
+    if not folds:
+        raise SystemExit(f"Not enough windows for a {train_windows}-window training span")
+
+    configs = generate_all_configs()
+    workers = resolve_workers(args.workers)
+
+    print("\n" + "="*80)
+    print(f"WALK-FORWARD ({len(folds)} folds, {'expanding' if args.expanding else 'rolling'} "
+          f"{train_windows}-window train, {test_windows}-window test, {len(configs)} configs)")
+    print("="*80)
+    report = walk_forward(trade_arrays, configs, folds, workers)
+
+    print(f"{'Fold':<6} {'Test from':<22} {'Train $':<10} {'Test ret':<10} {'Trades':<8} {'Equity':<10} Config")
+    print("-" * 120)
+    for k, fold in enumerate(report['folds'], 1):
+        print(f"{k:<6} {fold['test_start']:<22} ${fold['train_final_balance']:<9.2f} "
+              f"{fold['test_return']*100:>+8.2f}%  {fold['test_trades']:<8} ${fold['equity']:<9.2f} "
+              f"{config_to_string(fold['config'])}")
+
+    oos = report['oos']
+    in_sample = report['in_sample_best']
+    print(f"\nOut-of-sample: ${STARTING_BALANCE:.2f} -> ${oos['final_balance']:.2f} "
+          f"over {oos['total_trades']} trades (win rate {oos['win_rate']*100:.1f}%, "
+          f"min balance ${oos['max_drawdown']:.2f})")
+    print(f"Full-history best on the same windows: ${in_sample['result']['final_balance']:.2f} "
+          f"({config_to_string(in_sample['config'])}) -- in-sample, for reference only")
+
+    with open(args.output, 'w') as f:
+        json.dump({
+            'folds': report['folds'],
+            'oos': _json_result(oos),
+            'in_sample_best': dict(in_sample, result=_json_result(in_sample['result'])),
+            'train_windows': train_windows,
+            'test_windows': test_windows,
+            'expanding': args.expanding,
+        }, f, indent=2)
+    print(f"\nWalk-forward results saved to {args.output}")
+
+if __name__ == '__main__':
+    main()